@@ -0,0 +1,98 @@
+import random
+import re
+import time
+
+from profanity import BAD_WORDS, ProfanityMatcher
+
+CORPUS_SIZE = 50000
+ROUNDS = 5
+
+CLEAN_WORDS = [
+    "hey", "hello", "anyone", "online", "tonight", "game", "raid", "boss", "level",
+    "server", "ticket", "thanks", "lol", "gg", "wp", "what", "is", "the", "best",
+    "build", "for", "this", "season", "can", "someone", "help", "me", "with", "my",
+    "homework", "music", "bot", "role", "channel", "link", "stream", "later", "again",
+    "really", "nice", "update", "patch", "notes", "queue", "ranked", "map", "you",
+    "i", "we", "it", "was", "so", "good", "bad", "play", "team", "win", "lost"
+]
+
+TRAP_WORDS = [
+    "class", "assess", "passage", "assignment", "cocktail", "scunthorpe", "therapist",
+    "shiitake", "bass", "grass", "classic", "dickens", "hancock", "peacock", "shoe"
+]
+
+EVASIONS = ["sh1t", "a55", "f*ck", "ѕhit", "ｆｕｃｋ", "d1ck"]
+
+INFLECTIONS = [
+    "fucks", "bitches", "motherfucker", "dickhead", "shithead", "assholes", "niggas",
+    "faggots", "cunts", "retards", "whores", "nazis", "fucking", "dumbass", "sluts"
+]
+
+NUMBERS = ["455", "5318008", "1337", "room 455", "707", "call 555 0134", "$455"]
+
+def build_corpus(size: int, seed: int = 1337) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(CLEAN_WORDS, k=rng.randint(3, 24))
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(TRAP_WORDS))
+        roll = rng.random()
+        if roll < 0.03:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(BAD_WORDS))
+        elif roll < 0.04:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(EVASIONS))
+        elif roll < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(INFLECTIONS))
+        elif roll < 0.07:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NUMBERS))
+        message = " ".join(words)
+        if rng.random() < 0.2:
+            message = message.capitalize() + rng.choice(["!", "?", "...", " :)"])
+        corpus.append(message)
+    return corpus
+
+def run(name: str, search, corpus: list):
+    best = float('inf')
+    flagged = 0
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        flagged = sum(1 for message in corpus if search(message))
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<10} {len(corpus) / best:>12,.0f} msg/s   flagged {flagged}")
+    return flagged
+
+def main():
+    corpus = build_corpus(CORPUS_SIZE)
+    legacy_pattern = re.compile(
+        r'(' + '|'.join(re.escape(word) for word in BAD_WORDS) + r')',
+        re.IGNORECASE
+    )
+    matcher = ProfanityMatcher(BAD_WORDS)
+
+    print(f"Corpus: {len(corpus)} messages, best of {ROUNDS} rounds")
+    run("regex", legacy_pattern.search, corpus)
+    run("matcher", matcher.search, corpus)
+
+    false_positives = [m for m in corpus if legacy_pattern.search(m) and not matcher.search(m)]
+    unexplained = [m for m in false_positives if not any(trap in m.casefold() for trap in TRAP_WORDS)]
+    print(f"Messages flagged only by the regex: {len(false_positives)} ({len(unexplained)} without a clean trap word)")
+    for message in false_positives[:5]:
+        print(f"  {legacy_pattern.search(message).group(0)!r:<10} in {message!r}")
+
+    inflected = [m for m in corpus if any(word in m.casefold().split() for word in INFLECTIONS)]
+    missed = [m for m in inflected if not matcher.search(m)]
+    print(f"Inflected or compound profanity missed by the matcher: {len(missed)} of {len(inflected)}")
+    for message in missed[:5]:
+        print(f"  {message!r}")
+
+    trap_hits = [word for word in TRAP_WORDS if matcher.search(word)]
+    print(f"Clean trap words flagged by the matcher: {len(trap_hits)} {trap_hits}")
+
+    number_hits = [m for m in corpus if any(n in m for n in NUMBERS) and matcher.search(m)]
+    print(f"Messages with plain numbers flagged by the matcher: {len(number_hits)}")
+    for message in number_hits[:5]:
+        print(f"  {matcher.search(message)!r:<10} in {message!r}")
+
+if __name__ == "__main__":
+    main()
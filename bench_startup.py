@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+ROUNDS = 5
+
+MODULES = [
+    ("discord", "discord.py (always loaded)"),
+    ("openai", "OpenAI SDK (lazy)"),
+    ("google.generativeai", "Gemini SDK (lazy)"),
+]
+
+IMPORT_SCRIPT = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+def cold_import(module: str):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            return None
+        best = min(best, float(result.stdout.strip()))
+    return best
+
+def main():
+    print(f"Cold import time in a fresh interpreter, best of {ROUNDS} rounds")
+    lazy_total = 0.0
+    for module, label in MODULES:
+        seconds = cold_import(module)
+        if seconds is None:
+            print(f"{label:<30} not installed")
+            continue
+        print(f"{label:<30} {seconds * 1000:>9.1f} ms")
+        if module != "discord":
+            lazy_total += seconds
+
+    print(f"Saved per cold start by lazy AI imports: {lazy_total * 1000:.1f} ms")
+    print("Time from process start to gateway READY is logged by bot.py on first connect.")
+
+if __name__ == "__main__":
+    main()
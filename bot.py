@@ -1,3 +1,6 @@
+import time
+PROCESS_STARTED_AT = time.monotonic()
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -5,16 +8,22 @@ import os
 import datetime
 import re
 import asyncio
+import contextlib
+import gzip
+import hashlib
+import heapq
+import importlib
 import json
-from collections import deque
+import signal
+import sqlite3
+import sys
+from array import array
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
-try:
-    import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    genai = None
-    GENAI_AVAILABLE = False
+from profanity import BAD_WORDS, ProfanityMatcher, canonical_term
 import io
 
 load_dotenv()
@@ -27,45 +36,132 @@ CONFIG_FILE = "config.json"
 TICKET_CATEGORY_NAME = "Tickets"
 SUPPORT_ROLES_FILE = "support_roles.json"
 VERIFY_ROLES_FILE = "verify_roles.json"
+WARNINGS_FILE = "warnings.jsonl"
+BROADCASTS_FILE = "broadcasts.json"
+MUTES_FILE = "mutes.json"
+COMMAND_TREE_HASH_FILE = "command_tree.sha256"
+TRANSCRIPTS_DIR = os.environ.get("TRANSCRIPTS_DIR", "transcripts")
+TRANSCRIPT_CHUNK_SIZE = 200
+FLUSH_INTERVAL = 2.0
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json").lower()
+DATABASE_FILE = os.environ.get("DATABASE_FILE", "bot_data.db")
+
+STORE_FILES = {
+    'commands': COMMANDS_DATA_FILE,
+    'tickets': TICKETS_DATA_FILE,
+    'support_roles': SUPPORT_ROLES_FILE,
+    'verify_roles': VERIFY_ROLES_FILE,
+    'config': CONFIG_FILE,
+    'warnings': WARNINGS_FILE,
+    'broadcasts': BROADCASTS_FILE,
+    'mutes': MUTES_FILE
+}
+
+GUILD_STATE_STORES = {
+    'broadcasts': 'active_broadcasts',
+    'mutes': 'timed_mutes'
+}
 
 server_configs = {}
-
-BAD_WORDS = [
-    "fuck", "fucking", "fucked", "fucker", "fck", "f*ck",
-    "shit", "shitty", "shitting", "bullshit", "horseshit",
-    "bitch", "bitching", "bastard", "asshole",
-    "ass","dick", "cock", "penis", "pussy",
-    "vagina", "cunt", "whore", "slut", "hoe", "prostitute",
-    "nigger", "nigga", "negro", "n*gger", "n*gga",
-    "fag", "faggot", "f*ggot", "dyke", "retard", "retarded",
-    "terrorist", "rape", "raping", "rapist",
-    "kill yourself", "kys", "suicide", "cancer", "aids",
-    "holocaust", "dork", "nazi", "hitler", "slave", "slavery"
-]
+FEATURE_NAMES = ('info', 'kick', 'ban', 'timeout', 'cursing', 'spamming', 'dm', 'warn', 'ai_cache', 'raids')
+OPT_IN_FEATURES = ('raids',)
+CONFIG_SETTINGS = {
+    'spam_timeout': ('spam_timeout_minutes', "Spam Timeout Duration"),
+    'curse_timeout': ('curse_timeout_minutes', "Curse Timeout Duration"),
+    'ai_user_tokens': ('ai_user_tokens_per_minute', "AI Tokens per Minute (Per User)"),
+    'ai_guild_tokens': ('ai_guild_tokens_per_minute', "AI Tokens per Minute (Server)"),
+    'raid_users': ('raid_min_users', "Raid Threshold (Users)"),
+    'raid_channels': ('raid_min_channels', "Raid Threshold (Channels)")
+}
 
 SPAM_THRESHOLD = 5
 SPAM_COOLDOWN = 6
+SPAM_IDLE_SECONDS = 120
+SPAM_TRACKER_MAX_ENTRIES = int(os.environ.get("SPAM_TRACKER_MAX_ENTRIES", 50000))
+MODERATION_BATCH_WINDOW = 1.0
+MODERATION_MAX_CONCURRENCY = 5
+RAID_WINDOW_SECONDS = 30
+RAID_MIN_USERS = 4
+RAID_MIN_CHANNELS = 3
+RAID_MIN_CONTENT_LENGTH = 16
+RAID_MAX_THRESHOLD = 50
+RAID_NEW_ACCOUNT_DAYS = 7
+RAID_NEW_MEMBER_HOURS = 24
+RAID_MAX_TRACKED_PER_GUILD = 2000
+RAID_STRIP_PATTERN = re.compile(r"<[@#][!&]?\d+>|\d+|[\W_]+")
+RAID_LINK_PATTERN = re.compile(r"https?://|discord(?:\.gg|(?:app)?\.com/invite)/", re.IGNORECASE)
+TICKET_TOPIC_OWNER_PATTERN = re.compile(r"\((\d+)\)$")
 TICKET_COOLDOWN_DURATION = 60
 MAX_DM_PER_WARN = 5
+WARNINGS_PAGE_SIZE = 10
+MAX_ESCALATION_STEPS = 10
+MAX_TIMEOUT_MINUTES = 40320
 DM_DELAY = 0.5
+BROADCAST_INITIAL_CONCURRENCY = 2
+BROADCAST_MAX_CONCURRENCY = 10
+BROADCAST_SLOW_SECONDS = 2.0
+BROADCAST_PROGRESS_INTERVAL = 5
+BROADCAST_PROGRESS_TOKEN_TTL = 14 * 60
+MUTE_EXPIRY_CONCURRENCY = 5
+MUTED_ROLLOUT_INITIAL_CONCURRENCY = 4
+MUTED_ROLLOUT_MAX_CONCURRENCY = 16
+MUTED_ROLLOUT_SLOW_SECONDS = 2.0
+MUTED_ROLLOUT_PROGRESS_INTERVAL = 3
+MUTED_ROLLOUT_FAILURES_SHOWN = 10
+MUTED_ROLLOUT_RESPONSE_WAIT = 3
+MUTED_OVERWRITE = discord.PermissionOverwrite(send_messages=False, add_reactions=False, speak=False)
 MAX_EMBED_LENGTH = 4096
+MAX_FILTER_TERMS = 200
+MAX_FILTER_TERM_LENGTH = 100
+GEMINI_TIMEOUT = 30
+GEMINI_MAX_WORKERS = 4
+OPENAI_MAX_IN_FLIGHT = int(os.environ.get("OPENAI_MAX_IN_FLIGHT", 8))
+AI_USER_TOKENS_PER_MINUTE = int(os.environ.get("AI_USER_TOKENS_PER_MINUTE", 2000))
+AI_GUILD_TOKENS_PER_MINUTE = int(os.environ.get("AI_GUILD_TOKENS_PER_MINUTE", 20000))
+AI_BUCKET_IDLE_SECONDS = 300
+AI_STREAMING = os.environ.get("AI_STREAMING", "true").lower() != "false"
+STREAM_EDIT_INTERVAL = 1.5
+AI_CACHE_TTL = int(os.environ.get("AI_CACHE_TTL", 3600))
+AI_CACHE_SIZE = int(os.environ.get("AI_CACHE_SIZE", 256))
+PROMPT_HISTORY_MAX_PER_CHANNEL = int(os.environ.get("PROMPT_HISTORY_MAX_PER_CHANNEL", 200))
+PROMPT_HISTORY_MAX_AGE_DAYS = int(os.environ.get("PROMPT_HISTORY_MAX_AGE_DAYS", 30))
+PROMPT_HISTORY_MAX_BYTES = int(os.environ.get("PROMPT_HISTORY_MAX_BYTES", 5 * 1024 * 1024))
+PROMPT_HISTORY_COMPACT_THRESHOLD = 500
+WARNING_LOG_COMPACT_THRESHOLD = 5000
+PROMPT_ENTRY_OVERHEAD = 96
+MAINTENANCE_INTERVAL = 60
 
-user_messages = {}
 active_dm_tasks = {}
-user_warnings = {}
+active_broadcasts = {}
+timed_mutes = {}
+muted_role_rollouts = {}
+guild_warnings = {}
 user_dm_limits = {}
 prompt_messages = {}
+prompt_messages_by_user = {}
+prompt_history_order = OrderedDict()
+prompt_history_bytes = 0
+prompt_history_evicted = 0
 ticket_counter = {}
 active_tickets = {}
 ticket_claims = {}
+ticket_owners = {}
+ticket_status_messages = {}
+open_tickets_by_owner = {}
 support_roles = {}
 ticket_cooldowns = {}
+closing_tickets = set()
 verify_roles = {}
+dirty_stores = {}
+pending_warning_ops = []
+pending_deletes = {'commands': set(), 'tickets': set()}
+warning_log_growth = 0
+persistence_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
+transcript_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="transcripts")
 
-BAD_WORDS_PATTERN = re.compile(
-    r'(' + '|'.join(re.escape(word) for word in BAD_WORDS) + r')',
-    re.IGNORECASE
-)
+bad_words_matcher = ProfanityMatcher(BAD_WORDS)
+guild_configs = {}
+ticket_overwrite_templates = {}
 
 intents = discord.Intents.default()
 intents.members = True
@@ -74,47 +170,190 @@ intents.message_content = True
 class MyBot(commands.Bot):
     def __init__(self):
         super().__init__(command_prefix="!", intents=intents)
+        self.flush_task = None
+        self.maintenance_task = None
+        self.mute_task = None
+        self.ready_once = False
         
     async def setup_hook(self):
+        load_data()
+        print("Command data loaded.")
+        
+        self.add_view(TicketPanelView())
+        self.add_view(TicketControlsView())
+        print("Ticket views registered.")
+        
+        self.flush_task = asyncio.create_task(persistence_loop())
+        self.maintenance_task = asyncio.create_task(maintenance_loop())
+        self.mute_task = asyncio.create_task(mute_scheduler.run())
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except (NotImplementedError, RuntimeError):
+            pass
+        await self.sync_commands()
+
+    def command_tree_hash(self) -> str:
+        payload = []
+        for command in self.tree.get_commands():
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError:
+                payload.append(command.to_dict())
+        payload.sort(key=lambda command: (command.get('type', 1), command['name']))
+        data = json.dumps({'application_id': self.application_id, 'commands': payload}, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    async def sync_commands(self):
+        tree_hash = self.command_tree_hash()
+        try:
+            with open(COMMAND_TREE_HASH_FILE, 'r') as f:
+                if f.read().strip() == tree_hash:
+                    print("Slash commands unchanged, skipping sync.")
+                    return
+        except FileNotFoundError:
+            pass
+        
         await self.tree.sync()
+        _write_atomic(COMMAND_TREE_HASH_FILE, tree_hash)
         print("Slash commands synced!")
 
+    async def close(self):
+        if self.mute_task:
+            self.mute_task.cancel()
+            self.mute_task = None
+        if self.maintenance_task:
+            self.maintenance_task.cancel()
+            self.maintenance_task = None
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await moderation_queue.close()
+        await flush_data()
+        await asyncio.get_running_loop().run_in_executor(persistence_executor, storage_backend.close)
+        await super().close()
+
 bot = MyBot()
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
-
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-if GEMINI_API_KEY and GENAI_AVAILABLE:
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_client = True
-else:
-    gemini_client = None
-
-def get_server_config(guild_id: int):
-    if guild_id not in server_configs:
-        server_configs[guild_id] = {
-            'features': {
-                'info': True,
-                'kick': True,
-                'ban': True,
-                'timeout': True,
-                'cursing': True,
-                'spamming': True,
-                'dm': True,
-                'warn': True
-            },
-            'spam_timeout_minutes': 10,
-            'curse_timeout_minutes': 5
-        }
-    return server_configs[guild_id]
+openai_client = None
+genai = None
+unavailable_ai_sdks = set()
 
-def load_data():
-    global prompt_messages, ticket_counter, active_tickets, ticket_claims, support_roles, verify_roles, server_configs
+async def _import_ai_sdk(module_name: str):
+    if module_name in unavailable_ai_sdks:
+        return None
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, importlib.import_module, module_name)
+    except ImportError as e:
+        print(f"⚠️  Warning: {module_name} could not be imported ({e}). That AI provider is disabled.")
+        unavailable_ai_sdks.add(module_name)
+        return None
+
+async def get_openai_client():
+    global openai_client
+    if openai_client is None and OPENAI_API_KEY:
+        module = await _import_ai_sdk("openai")
+        if module and openai_client is None:
+            openai_client = module.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return openai_client
+
+async def get_genai():
+    global genai
+    if genai is None and GEMINI_API_KEY:
+        module = await _import_ai_sdk("google.generativeai")
+        if module and genai is None:
+            module.configure(api_key=GEMINI_API_KEY)
+            genai = module
+    return genai
+
+gemini_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_WORKERS, thread_name_prefix="gemini")
+
+@dataclass(frozen=True, slots=True)
+class GuildConfig:
+    info: bool = True
+    kick: bool = True
+    ban: bool = True
+    timeout: bool = True
+    cursing: bool = True
+    spamming: bool = True
+    dm: bool = True
+    warn: bool = True
+    ai_cache: bool = True
+    raids: bool = False
+    spam_timeout_minutes: int = 10
+    curse_timeout_minutes: int = 5
+    ai_user_tokens_per_minute: int = AI_USER_TOKENS_PER_MINUTE
+    ai_guild_tokens_per_minute: int = AI_GUILD_TOKENS_PER_MINUTE
+    raid_min_users: int = RAID_MIN_USERS
+    raid_min_channels: int = RAID_MIN_CHANNELS
+    transcript_channel_id: int = None
+    filter_words: tuple = ()
+    filter_excluded: tuple = ()
+    escalation: MappingProxyType = field(default_factory=lambda: MappingProxyType({}), hash=False)
+    matcher: ProfanityMatcher = field(default=bad_words_matcher, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GuildConfig":
+        features = data.get('features', {})
+        filter_words = tuple(data.get('filter_words', ()))
+        filter_excluded = tuple(data.get('filter_excluded', ()))
+        matcher = bad_words_matcher
+        if filter_words or filter_excluded:
+            excluded = set(filter_excluded)
+            terms = [word for word in BAD_WORDS if canonical_term(word) not in excluded]
+            matcher = ProfanityMatcher(terms + list(filter_words))
+        
+        return cls(
+            **{name: bool(features.get(name, name not in OPT_IN_FEATURES)) for name in FEATURE_NAMES},
+            spam_timeout_minutes=data.get('spam_timeout_minutes', 10),
+            curse_timeout_minutes=data.get('curse_timeout_minutes', 5),
+            ai_user_tokens_per_minute=data.get('ai_user_tokens_per_minute', AI_USER_TOKENS_PER_MINUTE),
+            ai_guild_tokens_per_minute=data.get('ai_guild_tokens_per_minute', AI_GUILD_TOKENS_PER_MINUTE),
+            raid_min_users=data.get('raid_min_users', RAID_MIN_USERS),
+            raid_min_channels=data.get('raid_min_channels', RAID_MIN_CHANNELS),
+            transcript_channel_id=data.get('transcript_channel_id'),
+            filter_words=filter_words,
+            filter_excluded=filter_excluded,
+            escalation=MappingProxyType({
+                int(threshold): MappingProxyType(dict(step)) for threshold, step in data.get('escalation', {}).items()
+            }),
+            matcher=matcher
+        )
+
+    def features(self) -> dict:
+        return {name: getattr(self, name) for name in FEATURE_NAMES}
+
+DEFAULT_GUILD_CONFIG = GuildConfig()
+
+def get_guild_config(guild_id: int) -> GuildConfig:
+    config = guild_configs.get(guild_id)
+    if config is None:
+        data = server_configs.get(guild_id)
+        config = GuildConfig.from_dict(data) if data else DEFAULT_GUILD_CONFIG
+        guild_configs[guild_id] = config
+    return config
+
+def update_guild_config(guild_id: int, **changes) -> GuildConfig:
+    data = dict(server_configs.get(guild_id) or {'features': DEFAULT_GUILD_CONFIG.features()})
+    for key, value in changes.items():
+        if value is None:
+            data.pop(key, None)
+        else:
+            data[key] = value
+    
+    server_configs[guild_id] = data
+    config = GuildConfig.from_dict(data)
+    guild_configs[guild_id] = config
+    save_data('config', key=guild_id)
+    return config
+
+def _load_json_state() -> dict:
+    state = {}
     try:
         with open(COMMANDS_DATA_FILE, 'r') as f:
             data = json.load(f)
-            prompt_messages = {int(k): {int(mk): mv for mk, mv in v.items()} for k, v in data.items()}
+            state['prompt_messages'] = {int(k): {int(mk): mv for mk, mv in v.items()} for k, v in data.items()}
     except FileNotFoundError:
         print("No command data file found. Starting fresh.")
     except Exception as e:
@@ -123,9 +362,11 @@ def load_data():
     try:
         with open(TICKETS_DATA_FILE, 'r') as f:
             tickets_data = json.load(f)
-            ticket_counter = {int(k): v for k, v in tickets_data.get('counter', {}).items()}
-            active_tickets = {int(k): v for k, v in tickets_data.get('active', {}).items()}
-            ticket_claims = {int(k): v for k, v in tickets_data.get('claims', {}).items()}
+            state['ticket_counter'] = {int(k): v for k, v in tickets_data.get('counter', {}).items()}
+            state['active_tickets'] = {int(k): v for k, v in tickets_data.get('active', {}).items()}
+            state['ticket_claims'] = {int(k): v for k, v in tickets_data.get('claims', {}).items()}
+            state['ticket_owners'] = {int(k): v for k, v in tickets_data.get('owners', {}).items()}
+            state['ticket_status_messages'] = {int(k): v for k, v in tickets_data.get('status', {}).items()}
     except FileNotFoundError:
         print("No tickets data file found. Starting fresh.")
     except Exception as e:
@@ -134,7 +375,7 @@ def load_data():
     try:
         with open(SUPPORT_ROLES_FILE, 'r') as f:
             support_roles_data = json.load(f)
-            support_roles = {int(k): v for k, v in support_roles_data.items()}
+            state['support_roles'] = {int(k): v for k, v in support_roles_data.items()}
     except FileNotFoundError:
         print("No support roles file found. Starting fresh.")
     except Exception as e:
@@ -143,7 +384,7 @@ def load_data():
     try:
         with open(VERIFY_ROLES_FILE, 'r') as f:
             verify_roles_data = json.load(f)
-            verify_roles = {int(k): v for k, v in verify_roles_data.items()}
+            state['verify_roles'] = {int(k): v for k, v in verify_roles_data.items()}
     except FileNotFoundError:
         print("No verify roles file found. Starting fresh.")
     except Exception as e:
@@ -152,51 +393,562 @@ def load_data():
     try:
         with open(CONFIG_FILE, 'r') as f:
             config_data = json.load(f)
-            server_configs = {int(k): v for k, v in config_data.items()}
+            state['server_configs'] = {int(k): v for k, v in config_data.items()}
     except FileNotFoundError:
         print("No config file found. Starting fresh.")
     except Exception as e:
         print(f"Error loading config: {e}")
-
-def save_data():
+    
     try:
-        data_to_save = {str(k): {str(mk): mv for mk, mv in v.items()} for k, v in prompt_messages.items()}
-        with open(COMMANDS_DATA_FILE, 'w') as f:
-            json.dump(data_to_save, f, indent=4)
+        state['guild_warnings'] = _load_warning_log()
     except Exception as e:
-        print(f"Error saving command data: {e}")
+        print(f"Error loading warnings: {e}")
     
+    for store, state_key in GUILD_STATE_STORES.items():
+        try:
+            with open(STORE_FILES[store], 'r') as f:
+                state[state_key] = {int(k): v for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading {store} data: {e}")
+    
+    return state
+
+def _warning_add_ops(warnings: dict) -> list:
+    return [
+        ('add', guild_id, user_id, warning)
+        for guild_id, users in warnings.items()
+        for user_id, user_warnings in users.items()
+        for warning in user_warnings
+    ]
+
+def _warning_op_lines(ops: list) -> list:
+    lines = []
+    for op, guild_id, user_id, warning in ops:
+        record = {'op': op, 'guild_id': guild_id, 'user_id': user_id}
+        if op == 'add':
+            record['warning'] = warning
+        lines.append(json.dumps(record, separators=(',', ':')) + "\n")
+    return lines
+
+def _load_warning_log() -> dict:
+    warnings = {}
+    records = 0
     try:
-        tickets_data = {
-            'counter': {str(k): v for k, v in ticket_counter.items()},
-            'active': {str(k): v for k, v in active_tickets.items()},
-            'claims': {str(k): v for k, v in ticket_claims.items()}
+        with open(WARNINGS_FILE, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print("Skipping a truncated record in the warnings log.")
+                    continue
+                records += 1
+                if record['op'] == 'add':
+                    warnings.setdefault(record['guild_id'], {}).setdefault(record['user_id'], []).append(record['warning'])
+                else:
+                    warnings.get(record['guild_id'], {}).pop(record['user_id'], None)
+    except FileNotFoundError:
+        print("No warnings file found. Starting fresh.")
+        return warnings
+    
+    live = sum(len(user_warnings) for users in warnings.values() for user_warnings in users.values())
+    if records != live:
+        _write_atomic(WARNINGS_FILE, "".join(_warning_op_lines(_warning_add_ops(warnings))))
+    return {guild_id: users for guild_id, users in warnings.items() if users}
+
+def _current_state() -> dict:
+    return {
+        'prompt_messages': prompt_messages,
+        'ticket_counter': ticket_counter,
+        'active_tickets': active_tickets,
+        'ticket_claims': ticket_claims,
+        'ticket_owners': ticket_owners,
+        'ticket_status_messages': ticket_status_messages,
+        'support_roles': support_roles,
+        'verify_roles': verify_roles,
+        'server_configs': server_configs,
+        'guild_warnings': guild_warnings,
+        'active_broadcasts': active_broadcasts,
+        'timed_mutes': timed_mutes
+    }
+
+def _write_atomic(path: str, payload: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class JsonBackend:
+    def load(self) -> dict:
+        return _load_json_state()
+
+    def snapshot(self, dirty: dict, state: dict) -> dict:
+        payloads = {}
+        logs = {}
+        appends = {}
+        for store, keys in dirty.items():
+            if store == 'warnings':
+                if keys is None:
+                    logs[WARNINGS_FILE] = _warning_add_ops(state['guild_warnings'])
+                else:
+                    appends[WARNINGS_FILE] = state['warning_ops']
+                continue
+            if store == 'commands':
+                data = {str(k): {str(mk): mv for mk, mv in v.items()} for k, v in state['prompt_messages'].items()}
+            elif store == 'tickets':
+                data = {
+                    'counter': {str(k): v for k, v in state['ticket_counter'].items()},
+                    'active': {str(k): list(v) for k, v in state['active_tickets'].items()},
+                    'claims': {str(k): v for k, v in state['ticket_claims'].items()},
+                    'owners': {str(k): v for k, v in state['ticket_owners'].items()},
+                    'status': {str(k): v for k, v in state['ticket_status_messages'].items()}
+                }
+            elif store == 'support_roles':
+                data = {str(k): list(v) for k, v in state['support_roles'].items()}
+            elif store == 'verify_roles':
+                data = {str(k): v for k, v in state['verify_roles'].items()}
+            elif store == 'config':
+                data = {str(k): v for k, v in state['server_configs'].items()}
+            elif store in GUILD_STATE_STORES:
+                data = {str(k): dict(v) for k, v in state[GUILD_STATE_STORES[store]].items()}
+            else:
+                raise ValueError(f"Unknown store: {store}")
+            payloads[STORE_FILES[store]] = data
+        return {'replace': payloads, 'logs': logs, 'append': appends}
+
+    def write(self, payloads: dict):
+        for path, data in payloads['replace'].items():
+            _write_atomic(path, json.dumps(data, separators=(',', ':')))
+        for path, ops in payloads['logs'].items():
+            _write_atomic(path, "".join(_warning_op_lines(ops)))
+        for path, ops in payloads['append'].items():
+            with open(path, 'a') as f:
+                f.write("".join(_warning_op_lines(ops)))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def compact(self):
+        _load_warning_log()
+
+    def close(self):
+        pass
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS prompt_messages (message_id INTEGER PRIMARY KEY, channel_id INTEGER NOT NULL, user_id INTEGER, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_prompt_messages_channel ON prompt_messages (channel_id);
+CREATE INDEX IF NOT EXISTS idx_prompt_messages_user ON prompt_messages (user_id);
+CREATE TABLE IF NOT EXISTS ticket_counter (guild_id INTEGER PRIMARY KEY, counter INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS active_tickets (channel_id INTEGER PRIMARY KEY, guild_id INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_active_tickets_guild ON active_tickets (guild_id);
+CREATE TABLE IF NOT EXISTS support_roles (guild_id INTEGER NOT NULL, role_id INTEGER NOT NULL, PRIMARY KEY (guild_id, role_id));
+CREATE TABLE IF NOT EXISTS verify_roles (guild_id INTEGER PRIMARY KEY, role_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS server_configs (guild_id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS warnings (id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS idx_warnings_guild_user ON warnings (guild_id, user_id);
+CREATE TABLE IF NOT EXISTS guild_state (store TEXT NOT NULL, guild_id INTEGER NOT NULL, data TEXT NOT NULL, PRIMARY KEY (store, guild_id));
+"""
+
+class SqliteBackend:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = None
+
+    def load(self) -> dict:
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        
+        if not self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            state = _load_json_state()
+            full_state = {**_current_state(), **state}
+            ops = self.snapshot({store: None for store in STORE_FILES}, full_state)
+            ops.append(("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", [(datetime.datetime.now().isoformat(),)]))
+            self.write(ops)
+            print("Migrated JSON data files into SQLite.")
+            return state
+        
+        state = {
+            'prompt_messages': {},
+            'ticket_counter': {},
+            'active_tickets': {},
+            'ticket_claims': {},
+            'ticket_owners': {},
+            'ticket_status_messages': {},
+            'support_roles': {},
+            'verify_roles': {},
+            'server_configs': {},
+            'guild_warnings': {}
         }
-        with open(TICKETS_DATA_FILE, 'w') as f:
-            json.dump(tickets_data, f, indent=4)
-    except Exception as e:
-        print(f"Error saving tickets data: {e}")
+        for state_key in GUILD_STATE_STORES.values():
+            state[state_key] = {}
+        for message_id, channel_id, data in self.conn.execute("SELECT message_id, channel_id, data FROM prompt_messages"):
+            state['prompt_messages'].setdefault(channel_id, {})[message_id] = json.loads(data)
+        for guild_id, counter in self.conn.execute("SELECT guild_id, counter FROM ticket_counter"):
+            state['ticket_counter'][guild_id] = counter
+        for channel_id, guild_id, data in self.conn.execute("SELECT channel_id, guild_id, data FROM active_tickets ORDER BY rowid"):
+            state['active_tickets'].setdefault(guild_id, []).append(channel_id)
+            data = json.loads(data)
+            if data.get('claimed_by'):
+                state['ticket_claims'][channel_id] = data['claimed_by']
+            if data.get('owner'):
+                state['ticket_owners'][channel_id] = data['owner']
+            if data.get('status_message'):
+                state['ticket_status_messages'][channel_id] = {'message_id': data['status_message'], 'number': data.get('number')}
+        for guild_id, role_id in self.conn.execute("SELECT guild_id, role_id FROM support_roles ORDER BY rowid"):
+            state['support_roles'].setdefault(guild_id, []).append(role_id)
+        for guild_id, role_id in self.conn.execute("SELECT guild_id, role_id FROM verify_roles"):
+            state['verify_roles'][guild_id] = role_id
+        for guild_id, data in self.conn.execute("SELECT guild_id, data FROM server_configs"):
+            state['server_configs'][guild_id] = json.loads(data)
+        for guild_id, user_id, data in self.conn.execute("SELECT guild_id, user_id, data FROM warnings ORDER BY id"):
+            state['guild_warnings'].setdefault(guild_id, {}).setdefault(user_id, []).append(json.loads(data))
+        for store, guild_id, data in self.conn.execute("SELECT store, guild_id, data FROM guild_state"):
+            if store in GUILD_STATE_STORES:
+                state[GUILD_STATE_STORES[store]][guild_id] = json.loads(data)
+        return state
+
+    def snapshot(self, dirty: dict, state: dict) -> list:
+        ops = []
+        for store, keys in dirty.items():
+            if store == 'commands':
+                channels = state['prompt_messages'] if keys is None else keys
+                rows = [(message_id, channel_id, entry.get('user_id'), json.dumps(entry))
+                        for channel_id in channels
+                        for message_id, entry in state['prompt_messages'].get(channel_id, {}).items()]
+                insert_sql = "INSERT OR REPLACE INTO prompt_messages (message_id, channel_id, user_id, data) VALUES (?, ?, ?, ?)"
+                if keys is None:
+                    ops.extend(self._replace("prompt_messages", "channel_id", keys, insert_sql, rows))
+                else:
+                    ops.extend(self._upsert("prompt_messages", "message_id", state['deletes']['commands'], insert_sql, rows))
+            elif store == 'tickets':
+                guilds = set(state['ticket_counter']) | set(state['active_tickets']) if keys is None else keys
+                rows = [(guild_id, state['ticket_counter'][guild_id]) for guild_id in guilds if guild_id in state['ticket_counter']]
+                insert_sql = "INSERT OR REPLACE INTO ticket_counter (guild_id, counter) VALUES (?, ?)"
+                if keys is None:
+                    ops.extend(self._replace("ticket_counter", "guild_id", keys, insert_sql, rows))
+                else:
+                    ops.extend(self._upsert("ticket_counter", "guild_id", (), insert_sql, rows))
+                rows = [(channel_id, guild_id, json.dumps({
+                            'claimed_by': state['ticket_claims'].get(channel_id),
+                            'owner': state['ticket_owners'].get(channel_id),
+                            'status_message': state['ticket_status_messages'].get(channel_id, {}).get('message_id'),
+                            'number': state['ticket_status_messages'].get(channel_id, {}).get('number')
+                        }))
+                        for guild_id in guilds
+                        for channel_id in state['active_tickets'].get(guild_id, [])]
+                insert_sql = "INSERT OR REPLACE INTO active_tickets (channel_id, guild_id, data) VALUES (?, ?, ?)"
+                if keys is None:
+                    ops.extend(self._replace("active_tickets", "guild_id", keys, insert_sql, rows))
+                else:
+                    ops.extend(self._upsert("active_tickets", "channel_id", state['deletes']['tickets'], insert_sql, rows))
+            elif store == 'support_roles':
+                guilds = state['support_roles'] if keys is None else keys
+                ops.extend(self._replace(
+                    "support_roles", "guild_id", keys,
+                    "INSERT INTO support_roles (guild_id, role_id) VALUES (?, ?)",
+                    [(guild_id, role_id) for guild_id in guilds for role_id in state['support_roles'].get(guild_id, [])]
+                ))
+            elif store == 'verify_roles':
+                guilds = state['verify_roles'] if keys is None else keys
+                ops.extend(self._replace(
+                    "verify_roles", "guild_id", keys,
+                    "INSERT INTO verify_roles (guild_id, role_id) VALUES (?, ?)",
+                    [(guild_id, state['verify_roles'][guild_id]) for guild_id in guilds if guild_id in state['verify_roles']]
+                ))
+            elif store == 'config':
+                guilds = state['server_configs'] if keys is None else keys
+                ops.extend(self._replace(
+                    "server_configs", "guild_id", keys,
+                    "INSERT INTO server_configs (guild_id, data) VALUES (?, ?)",
+                    [(guild_id, json.dumps(state['server_configs'][guild_id])) for guild_id in guilds if guild_id in state['server_configs']]
+                ))
+            elif store == 'warnings':
+                warnings = state['guild_warnings']
+                if keys is not None:
+                    for op, guild_id, user_id, warning in state['warning_ops']:
+                        if op == 'add':
+                            sql, row = "INSERT INTO warnings (guild_id, user_id, data) VALUES (?, ?, ?)", (guild_id, user_id, json.dumps(warning))
+                        else:
+                            sql, row = "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (guild_id, user_id)
+                        if ops and ops[-1][0] == sql:
+                            ops[-1][1].append(row)
+                        else:
+                            ops.append((sql, [row]))
+                    continue
+                ops.append(("DELETE FROM warnings", [()]))
+                rows = [(guild_id, user_id, json.dumps(warning))
+                        for guild_id, users in warnings.items()
+                        for user_id, user_warnings in users.items()
+                        for warning in user_warnings]
+                if rows:
+                    ops.append(("INSERT INTO warnings (guild_id, user_id, data) VALUES (?, ?, ?)", rows))
+            elif store in GUILD_STATE_STORES:
+                values = state[GUILD_STATE_STORES[store]]
+                guilds = values if keys is None else keys
+                if keys is None:
+                    ops.append(("DELETE FROM guild_state WHERE store = ?", [(store,)]))
+                else:
+                    ops.append(("DELETE FROM guild_state WHERE store = ? AND guild_id = ?", [(store, key) for key in keys]))
+                rows = [(store, guild_id, json.dumps(values[guild_id])) for guild_id in guilds if guild_id in values]
+                if rows:
+                    ops.append(("INSERT INTO guild_state (store, guild_id, data) VALUES (?, ?, ?)", rows))
+            else:
+                raise ValueError(f"Unknown store: {store}")
+        return ops
+
+    def _replace(self, table: str, column: str, keys, insert_sql: str, rows: list) -> list:
+        if keys is None:
+            ops = [(f"DELETE FROM {table}", [()])]
+        else:
+            ops = [(f"DELETE FROM {table} WHERE {column} = ?", [(key,) for key in keys])]
+        if rows:
+            ops.append((insert_sql, rows))
+        return ops
+
+    def _upsert(self, table: str, column: str, deleted, insert_sql: str, rows: list) -> list:
+        ops = []
+        if deleted:
+            ops.append((f"DELETE FROM {table} WHERE {column} = ?", [(key,) for key in deleted]))
+        if rows:
+            ops.append((insert_sql, rows))
+        return ops
+
+    def write(self, ops: list):
+        with self.conn:
+            for sql, rows in ops:
+                self.conn.executemany(sql, rows)
+
+    def compact(self):
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+storage_backend = SqliteBackend(DATABASE_FILE) if STORAGE_BACKEND == "sqlite" else JsonBackend()
+
+def load_data():
+    global prompt_messages, ticket_counter, active_tickets, ticket_claims, ticket_owners, ticket_status_messages, support_roles, verify_roles, server_configs, guild_warnings, active_broadcasts, timed_mutes
+    state = storage_backend.load()
+    prompt_messages = state.get('prompt_messages', prompt_messages)
+    ticket_counter = state.get('ticket_counter', ticket_counter)
+    active_tickets = state.get('active_tickets', active_tickets)
+    ticket_claims = state.get('ticket_claims', ticket_claims)
+    ticket_owners = state.get('ticket_owners', ticket_owners)
+    ticket_status_messages = state.get('ticket_status_messages', ticket_status_messages)
+    support_roles = state.get('support_roles', support_roles)
+    verify_roles = state.get('verify_roles', verify_roles)
+    server_configs = state.get('server_configs', server_configs)
+    guild_warnings = state.get('guild_warnings', guild_warnings)
+    active_broadcasts = state.get('active_broadcasts', active_broadcasts)
+    timed_mutes = state.get('timed_mutes', timed_mutes)
+    guild_configs.clear()
+    ticket_overwrite_templates.clear()
+    rebuild_prompt_index()
+    rebuild_ticket_owner_index()
+    mute_scheduler.load()
+
+def save_data(*stores: str, key=None):
+    for store in stores or STORE_FILES:
+        if key is None:
+            dirty_stores[store] = None
+        elif store not in dirty_stores:
+            dirty_stores[store] = {key}
+        elif dirty_stores[store] is not None:
+            dirty_stores[store].add(key)
+
+def _merge_dirty(dirty: dict):
+    for store, keys in dirty.items():
+        if keys is None:
+            save_data(store)
+        else:
+            for key in keys:
+                save_data(store, key=key)
+
+async def flush_data():
+    global warning_log_growth
+    if not dirty_stores:
+        return
     
-    try:
-        support_roles_data = {str(k): v for k, v in support_roles.items()}
-        with open(SUPPORT_ROLES_FILE, 'w') as f:
-            json.dump(support_roles_data, f, indent=4)
-    except Exception as e:
-        print(f"Error saving support roles: {e}")
+    dirty = dict(dirty_stores)
+    dirty_stores.clear()
+    warning_ops = pending_warning_ops[:]
+    pending_warning_ops.clear()
+    deletes = {store: set(ids) for store, ids in pending_deletes.items()}
+    for ids in pending_deletes.values():
+        ids.clear()
     
     try:
-        verify_roles_data = {str(k): v for k, v in verify_roles.items()}
-        with open(VERIFY_ROLES_FILE, 'w') as f:
-            json.dump(verify_roles_data, f, indent=4)
+        state = _current_state()
+        state['warning_ops'] = warning_ops
+        state['deletes'] = deletes
+        payload = storage_backend.snapshot(dirty, state)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(persistence_executor, storage_backend.write, payload)
+        if dirty.get('warnings') is not None:
+            warning_log_growth += len(warning_ops)
     except Exception as e:
-        print(f"Error saving verify roles: {e}")
+        print(f"Error saving data: {e}")
+        _merge_dirty(dirty)
+        for store, ids in deletes.items():
+            pending_deletes[store] |= ids
+        if warning_ops:
+            save_data('warnings')
+
+async def persistence_loop():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            await flush_data()
+        except Exception as e:
+            print(f"Error flushing data: {e}")
+
+def _prompt_entry_size(entry: dict) -> int:
+    return len(entry.get('prompt', '')) + PROMPT_ENTRY_OVERHEAD
+
+def _index_prompt_message(channel_id: int, message_id: int, entry: dict):
+    global prompt_history_bytes
+    prompt_messages_by_user.setdefault(entry.get('user_id'), {})[message_id] = channel_id
+    prompt_history_order[message_id] = channel_id
+    prompt_history_bytes += _prompt_entry_size(entry)
+
+def _evict_prompt_message(channel_id: int, message_id: int):
+    global prompt_history_bytes, prompt_history_evicted
+    channel_history = prompt_messages.get(channel_id, {})
+    entry = channel_history.pop(message_id, None)
+    prompt_history_order.pop(message_id, None)
+    if entry is None:
+        return
+    if not channel_history:
+        prompt_messages.pop(channel_id, None)
+    
+    user_index = prompt_messages_by_user.get(entry.get('user_id'))
+    if user_index is not None:
+        user_index.pop(message_id, None)
+        if not user_index:
+            del prompt_messages_by_user[entry.get('user_id')]
+    
+    prompt_history_bytes -= _prompt_entry_size(entry)
+    prompt_history_evicted += 1
+    pending_deletes['commands'].add(message_id)
+    save_data('commands', key=channel_id)
+
+def _enforce_prompt_budget(channel_id: int = None):
+    if channel_id is not None:
+        channel_history = prompt_messages.get(channel_id, {})
+        while len(channel_history) > PROMPT_HISTORY_MAX_PER_CHANNEL:
+            _evict_prompt_message(channel_id, next(iter(channel_history)))
+    
+    while prompt_history_order and prompt_history_bytes > PROMPT_HISTORY_MAX_BYTES:
+        message_id, oldest_channel_id = next(iter(prompt_history_order.items()))
+        _evict_prompt_message(oldest_channel_id, message_id)
+
+def record_prompt_message(channel_id: int, message_id: int, entry: dict):
+    if channel_id not in prompt_messages:
+        prompt_messages[channel_id] = {}
     
-    try:
-        config_data = {str(k): v for k, v in server_configs.items()}
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config_data, f, indent=4)
-    except Exception as e:
-        print(f"Error saving config: {e}")
+    prompt_messages[channel_id][message_id] = entry
+    _index_prompt_message(channel_id, message_id, entry)
+    save_data('commands', key=channel_id)
+    _enforce_prompt_budget(channel_id)
+
+def prune_prompt_history():
+    cutoff = discord.utils.time_snowflake(discord.utils.utcnow() - datetime.timedelta(days=PROMPT_HISTORY_MAX_AGE_DAYS))
+    while prompt_history_order:
+        message_id, channel_id = next(iter(prompt_history_order.items()))
+        if message_id >= cutoff:
+            break
+        _evict_prompt_message(channel_id, message_id)
+
+def rebuild_prompt_index():
+    global prompt_history_bytes
+    prompt_messages_by_user.clear()
+    prompt_history_order.clear()
+    prompt_history_bytes = 0
+    
+    entries = sorted(
+        (message_id, channel_id, entry)
+        for channel_id, channel_history in prompt_messages.items()
+        for message_id, entry in channel_history.items()
+    )
+    for channel_id in prompt_messages:
+        prompt_messages[channel_id] = {}
+    for message_id, channel_id, entry in entries:
+        prompt_messages[channel_id][message_id] = entry
+        _index_prompt_message(channel_id, message_id, entry)
+    
+    for channel_id in list(prompt_messages):
+        _enforce_prompt_budget(channel_id)
+    prune_prompt_history()
+
+async def maintenance_loop():
+    global prompt_history_evicted, warning_log_growth
+    while True:
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+        try:
+            prune_prompt_history()
+            spam_tracker.sweep()
+            raid_detector.sweep()
+            ai_user_buckets.evict_idle(AI_BUCKET_IDLE_SECONDS)
+            ai_guild_buckets.evict_idle(AI_BUCKET_IDLE_SECONDS)
+            if prompt_history_evicted >= PROMPT_HISTORY_COMPACT_THRESHOLD or warning_log_growth >= WARNING_LOG_COMPACT_THRESHOLD:
+                prompt_history_evicted = 0
+                warning_log_growth = 0
+                await flush_data()
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(persistence_executor, storage_backend.compact)
+        except Exception as e:
+            print(f"Error running maintenance: {e}")
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial: int, maximum: int, slow_seconds: float):
+        self.limit = initial
+        self.maximum = maximum
+        self.slow_seconds = slow_seconds
+        self.in_flight = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.condition = None
+
+    async def run(self, action):
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        
+        started = time.monotonic()
+        rate_limited = False
+        try:
+            return await action()
+        except discord.RateLimited:
+            rate_limited = True
+            raise
+        except discord.HTTPException as e:
+            rate_limited = e.status == 429
+            raise
+        finally:
+            slow = rate_limited or time.monotonic() - started > self.slow_seconds
+            async with self.condition:
+                self.in_flight -= 1
+                if slow:
+                    self.rate_limited += 1
+                    self.limit = max(1, self.limit // 2)
+                    self.successes = 0
+                else:
+                    self.successes += 1
+                    if self.successes >= self.limit and self.limit < self.maximum:
+                        self.limit += 1
+                        self.successes = 0
+                self.condition.notify_all()
 
 def can_manage_tickets(member: discord.Member, guild_id: int) -> bool:
     if member.guild_permissions.administrator:
@@ -209,7 +961,248 @@ def can_manage_tickets(member: discord.Member, guild_id: int) -> bool:
     
     return False
 
-async def get_or_create_muted_role(guild: discord.Guild) -> discord.Role:
+def rebuild_ticket_owner_index():
+    open_tickets_by_owner.clear()
+    for guild_id, channel_ids in active_tickets.items():
+        for channel_id in channel_ids:
+            if channel_id in ticket_owners:
+                open_tickets_by_owner[(guild_id, ticket_owners[channel_id])] = channel_id
+
+def index_ticket_topics():
+    for guild in bot.guilds:
+        channel_ids = active_tickets.get(guild.id)
+        if not channel_ids:
+            continue
+        
+        changed = False
+        for channel_id in list(channel_ids):
+            channel = guild.get_channel(channel_id)
+            if not channel:
+                untrack_ticket(guild.id, channel_id)
+                continue
+            match = TICKET_TOPIC_OWNER_PATTERN.search(channel.topic or "")
+            if match and ticket_owners.get(channel_id) != int(match.group(1)):
+                track_ticket(guild.id, channel_id, int(match.group(1)))
+                changed = True
+        if changed:
+            save_data('tickets', key=guild.id)
+
+def track_ticket(guild_id: int, channel_id: int, owner_id: int):
+    channel_ids = active_tickets.setdefault(guild_id, [])
+    if channel_id not in channel_ids:
+        channel_ids.append(channel_id)
+    previous_owner = ticket_owners.get(channel_id)
+    if previous_owner and open_tickets_by_owner.get((guild_id, previous_owner)) == channel_id:
+        del open_tickets_by_owner[(guild_id, previous_owner)]
+    ticket_owners[channel_id] = owner_id
+    open_tickets_by_owner[(guild_id, owner_id)] = channel_id
+
+def untrack_ticket(guild_id: int, channel_id: int):
+    channel_ids = active_tickets.get(guild_id)
+    if not channel_ids or channel_id not in channel_ids:
+        return
+    
+    channel_ids.remove(channel_id)
+    ticket_claims.pop(channel_id, None)
+    ticket_status_messages.pop(channel_id, None)
+    owner_id = ticket_owners.pop(channel_id, None)
+    if owner_id and open_tickets_by_owner.get((guild_id, owner_id)) == channel_id:
+        del open_tickets_by_owner[(guild_id, owner_id)]
+    pending_deletes['tickets'].add(channel_id)
+    save_data('tickets', key=guild_id)
+
+def build_ticket_status_embed(number: int, owner_id: int, claimed_by: int = None) -> discord.Embed:
+    embed = discord.Embed(
+        title="🎫 Ticket Created",
+        description=f"Welcome <@{owner_id}>! Please describe your issue and a staff member will assist you shortly.",
+        color=discord.Color.green()
+    )
+    embed.add_field(
+        name="Ticket Number",
+        value=f"#{number:04d}" if number else "Unknown",
+        inline=True
+    )
+    embed.add_field(
+        name="Created By",
+        value=f"<@{owner_id}>",
+        inline=True
+    )
+    embed.add_field(
+        name="Status",
+        value=f"✅ Claimed by <@{claimed_by}>" if claimed_by else "⏳ Unclaimed",
+        inline=True
+    )
+    embed.set_footer(text="Staff: Use the buttons below to manage this ticket")
+    return embed
+
+async def update_ticket_status(channel: discord.TextChannel):
+    status = ticket_status_messages.get(channel.id)
+    if status:
+        embed = build_ticket_status_embed(status['number'], ticket_owners.get(channel.id), ticket_claims.get(channel.id))
+        try:
+            await channel.get_partial_message(status['message_id']).edit(embed=embed)
+        except discord.NotFound:
+            ticket_status_messages.pop(channel.id, None)
+            save_data('tickets', key=channel.guild.id)
+        except Exception as e:
+            print(f"Error updating ticket status in #{channel.name}: {e}")
+        return
+    
+    async for msg in channel.history(limit=10):
+        if msg.author == bot.user and msg.embeds and "Ticket Created" in (msg.embeds[0].title or ""):
+            new_embed = msg.embeds[0]
+            claimed_by = ticket_claims.get(channel.id)
+            for i, embed_field in enumerate(new_embed.fields):
+                if embed_field.name == "Status":
+                    new_embed.set_field_at(i, name="Status", value=f"✅ Claimed by <@{claimed_by}>" if claimed_by else "⏳ Unclaimed", inline=True)
+            await msg.edit(embed=new_embed)
+            break
+
+def get_ticket_overwrites(guild: discord.Guild) -> dict:
+    template = ticket_overwrite_templates.get(guild.id)
+    if template is None:
+        template = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(
+                read_messages=True,
+                send_messages=True,
+                manage_channels=True
+            )
+        }
+        staff_overwrite = discord.PermissionOverwrite(
+            read_messages=True,
+            send_messages=True,
+            manage_messages=True
+        )
+        
+        for role in guild.roles:
+            if role.permissions.administrator:
+                template[role] = staff_overwrite
+        
+        for role_id in support_roles.get(guild.id, []):
+            role = guild.get_role(role_id)
+            if role:
+                template[role] = staff_overwrite
+        
+        ticket_overwrite_templates[guild.id] = template
+    return template
+
+def _transcript_record(message: discord.Message) -> dict:
+    return {
+        'id': message.id,
+        'author_id': message.author.id,
+        'author': str(message.author),
+        'created_at': message.created_at.isoformat(),
+        'edited_at': message.edited_at.isoformat() if message.edited_at else None,
+        'content': message.content,
+        'attachments': [attachment.url for attachment in message.attachments],
+        'embeds': [embed.to_dict() for embed in message.embeds]
+    }
+
+def _open_transcript(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return gzip.open(f"{path}.tmp", 'wt', encoding='utf-8')
+
+def _finish_transcript(handle, path: str):
+    handle.close()
+    os.replace(f"{path}.tmp", path)
+
+async def archive_ticket_transcript(channel: discord.TextChannel, closed_by: discord.Member) -> tuple:
+    path = os.path.join(TRANSCRIPTS_DIR, str(channel.guild.id), f"{channel.name}-{channel.id}.jsonl.gz")
+    loop = asyncio.get_running_loop()
+    handle = await loop.run_in_executor(transcript_executor, _open_transcript, path)
+    
+    header = {
+        'ticket': ticket_status_messages.get(channel.id, {}).get('number'),
+        'channel_id': channel.id,
+        'guild_id': channel.guild.id,
+        'owner_id': ticket_owners.get(channel.id),
+        'claimed_by': ticket_claims.get(channel.id),
+        'closed_by': closed_by.id,
+        'closed_at': discord.utils.utcnow().isoformat()
+    }
+    lines = [json.dumps(header) + "\n"]
+    count = 0
+    try:
+        async for message in channel.history(limit=None, oldest_first=True):
+            lines.append(json.dumps(_transcript_record(message)) + "\n")
+            count += 1
+            if len(lines) >= TRANSCRIPT_CHUNK_SIZE:
+                await loop.run_in_executor(transcript_executor, handle.write, "".join(lines))
+                lines = []
+        
+        if lines:
+            await loop.run_in_executor(transcript_executor, handle.write, "".join(lines))
+        await loop.run_in_executor(transcript_executor, _finish_transcript, handle, path)
+    except BaseException:
+        await loop.run_in_executor(transcript_executor, handle.close)
+        with contextlib.suppress(OSError):
+            os.remove(f"{path}.tmp")
+        raise
+    
+    return path, count
+
+async def post_ticket_transcript(channel: discord.TextChannel, closed_by: discord.Member, path: str, count: int):
+    log_channel_id = get_guild_config(channel.guild.id).transcript_channel_id
+    log_channel = channel.guild.get_channel(log_channel_id) if log_channel_id else None
+    if not log_channel:
+        return
+    
+    owner_id = ticket_owners.get(channel.id)
+    embed = discord.Embed(
+        title="📜 Ticket Transcript",
+        description=f"**Ticket:** #{channel.name}\n**Opened By:** {f'<@{owner_id}>' if owner_id else 'Unknown'}\n**Messages:** {count}",
+        color=discord.Color.dark_gray()
+    )
+    embed.set_footer(text=f"Closed by {closed_by.display_name}")
+    
+    try:
+        if os.path.getsize(path) <= channel.guild.filesize_limit:
+            await log_channel.send(embed=embed, file=discord.File(path))
+        else:
+            embed.add_field(name="Archive", value=f"Too large to upload, saved as `{path}`", inline=False)
+            await log_channel.send(embed=embed)
+    except Exception as e:
+        print(f"Error posting transcript for #{channel.name}: {e}")
+
+async def close_ticket(interaction: discord.Interaction):
+    channel = interaction.channel
+    guild_id = interaction.guild.id
+    
+    if channel.id not in active_tickets.get(guild_id, []):
+        await interaction.response.send_message("❌ This is not an active ticket channel.", ephemeral=True)
+        return
+    
+    if channel.id in closing_tickets:
+        await interaction.response.send_message("❌ This ticket is already being closed.", ephemeral=True)
+        return
+    
+    closing_tickets.add(channel.id)
+    try:
+        embed = discord.Embed(
+            title="🔒 Closing Ticket",
+            description="This ticket will be archived and deleted in 5 seconds...",
+            color=discord.Color.red()
+        )
+        embed.set_footer(text=f"Closed by {interaction.user.display_name}")
+        await interaction.response.send_message(embed=embed)
+        
+        await asyncio.sleep(5)
+        
+        try:
+            path, count = await archive_ticket_transcript(channel, interaction.user)
+        except Exception as e:
+            print(f"Error archiving transcript for #{channel.name}: {e}")
+            await channel.send(f"❌ Failed to archive this ticket, so it was left open: {e}")
+            return
+        
+        await post_ticket_transcript(channel, interaction.user, path, count)
+        untrack_ticket(guild_id, channel.id)
+        await channel.delete(reason=f"Ticket closed by {interaction.user.display_name}")
+    finally:
+        closing_tickets.discard(channel.id)
+
+async def get_or_create_muted_role(guild: discord.Guild, interaction: discord.Interaction = None) -> discord.Role:
     muted_role = discord.utils.get(guild.roles, name=DEFAULT_MUTED_ROLE_NAME)
     
     if not muted_role:
@@ -219,23 +1212,163 @@ async def get_or_create_muted_role(guild: discord.Guild) -> discord.Role:
                 reason="Auto-created for mute command",
                 color=discord.Color.dark_gray()
             )
-            
-            for channel in guild.channels:
-                try:
-                    await channel.set_permissions(
-                        muted_role,
-                        send_messages=False,
-                        add_reactions=False,
-                        speak=False
-                    )
-                except:
-                    pass
         except Exception as e:
             print(f"Error creating muted role: {e}")
             return None
+        
+        task = asyncio.create_task(rollout_muted_overwrites(guild, muted_role, interaction))
+        muted_role_rollouts[guild.id] = task
+        task.add_done_callback(lambda _: muted_role_rollouts.pop(guild.id, None))
     
     return muted_role
 
+async def apply_muted_overwrite(channel: discord.abc.GuildChannel, muted_role: discord.Role):
+    if channel.overwrites_for(muted_role) != MUTED_OVERWRITE:
+        await channel.set_permissions(muted_role, overwrite=MUTED_OVERWRITE, reason="Muted role setup")
+
+def _rollout_embed(state: dict, done: bool) -> discord.Embed:
+    embed = discord.Embed(
+        title="✅ Muted Role Setup Complete" if done else "🔧 Setting Up Muted Role...",
+        description=(
+            f"**Channels Updated:** {state['updated']}/{state['total']}\n"
+            f"**Failed:** {len(state['failed'])}"
+        ),
+        color=(discord.Color.orange() if state['failed'] else discord.Color.green()) if done else discord.Color.blue()
+    )
+    if state['failed']:
+        shown = ", ".join(state['failed'][:MUTED_ROLLOUT_FAILURES_SHOWN])
+        if len(state['failed']) > MUTED_ROLLOUT_FAILURES_SHOWN:
+            shown += f" and {len(state['failed']) - MUTED_ROLLOUT_FAILURES_SHOWN} more"
+        embed.add_field(name="Could Not Update", value=shown[:1024], inline=False)
+    return embed
+
+async def rollout_muted_overwrites(guild: discord.Guild, muted_role: discord.Role, interaction: discord.Interaction = None):
+    channels = list(guild.channels)
+    state = {'updated': 0, 'failed': [], 'total': len(channels)}
+    limiter = AdaptiveLimiter(MUTED_ROLLOUT_INITIAL_CONCURRENCY, MUTED_ROLLOUT_MAX_CONCURRENCY, MUTED_ROLLOUT_SLOW_SECONDS)
+    remaining = iter(channels)
+    
+    async def worker():
+        for channel in remaining:
+            try:
+                await limiter.run(lambda: apply_muted_overwrite(channel, muted_role))
+                state['updated'] += 1
+            except Exception as e:
+                print(f"Error setting Muted overwrite on #{channel.name} in {guild.name}: {e}")
+                state['failed'].append(channel.mention)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(MUTED_ROLLOUT_MAX_CONCURRENCY)]
+    progress_message = None
+    
+    try:
+        while True:
+            _, running = await asyncio.wait(workers, timeout=MUTED_ROLLOUT_PROGRESS_INTERVAL)
+            if not running:
+                break
+            if interaction and interaction.response.is_done():
+                try:
+                    if progress_message:
+                        await progress_message.edit(embed=_rollout_embed(state, False))
+                    else:
+                        progress_message = await interaction.followup.send(embed=_rollout_embed(state, False), ephemeral=True, wait=True)
+                except Exception:
+                    interaction = None
+    finally:
+        for task in workers:
+            task.cancel()
+    
+    print(f"Muted role setup in {guild.name}: {state['updated']} updated, {len(state['failed'])} failed of {state['total']}")
+    if interaction:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + MUTED_ROLLOUT_RESPONSE_WAIT
+        while not interaction.response.is_done() and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        try:
+            if progress_message:
+                await progress_message.edit(embed=_rollout_embed(state, True))
+            else:
+                await interaction.followup.send(embed=_rollout_embed(state, True), ephemeral=True)
+        except Exception as e:
+            print(f"Error sending Muted role setup summary in {guild.name}: {e}")
+
+class MuteScheduler:
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.heap = []
+        self.wakeup = None
+        self.limiter = None
+        self.expired = 0
+
+    def pending(self) -> int:
+        return sum(len(mutes) for mutes in timed_mutes.values())
+
+    def load(self):
+        self.heap = [
+            (expires_at, guild_id, int(user_id))
+            for guild_id, mutes in timed_mutes.items()
+            for user_id, expires_at in mutes.items()
+        ]
+        heapq.heapify(self.heap)
+        if self.wakeup:
+            self.wakeup.set()
+
+    def schedule(self, guild_id: int, user_id: int, expires_at: float):
+        if guild_id not in timed_mutes:
+            timed_mutes[guild_id] = {}
+        timed_mutes[guild_id][str(user_id)] = expires_at
+        save_data('mutes', key=guild_id)
+        
+        heapq.heappush(self.heap, (expires_at, guild_id, user_id))
+        if self.wakeup and self.heap[0][0] == expires_at:
+            self.wakeup.set()
+
+    def cancel(self, guild_id: int, user_id: int):
+        mutes = timed_mutes.get(guild_id)
+        if mutes and mutes.pop(str(user_id), None) is not None:
+            if not mutes:
+                del timed_mutes[guild_id]
+            save_data('mutes', key=guild_id)
+
+    async def run(self):
+        self.wakeup = asyncio.Event()
+        self.limiter = asyncio.Semaphore(self.max_concurrency)
+        await bot.wait_until_ready()
+        
+        while True:
+            now = time.time()
+            while self.heap and self.heap[0][0] <= now:
+                expires_at, guild_id, user_id = heapq.heappop(self.heap)
+                if timed_mutes.get(guild_id, {}).get(str(user_id)) != expires_at:
+                    continue
+                self.cancel(guild_id, user_id)
+                self.expired += 1
+                asyncio.create_task(self._expire(guild_id, user_id))
+            
+            self.wakeup.clear()
+            timeout = self.heap[0][0] - now if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, guild_id: int, user_id: int):
+        guild = bot.get_guild(guild_id)
+        if not guild:
+            return
+        
+        async with self.limiter:
+            try:
+                member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+                muted_role = discord.utils.get(guild.roles, name=DEFAULT_MUTED_ROLE_NAME)
+                if muted_role and muted_role in member.roles:
+                    await member.remove_roles(muted_role, reason="Mute duration expired")
+            except discord.NotFound:
+                pass
+            except Exception as e:
+                print(f"Error expiring mute for {user_id} in {guild.name}: {e}")
+
+mute_scheduler = MuteScheduler(MUTE_EXPIRY_CONCURRENCY)
+
 class TicketPanelView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -260,14 +1393,14 @@ class TicketPanelView(discord.ui.View):
                 )
                 return
         
-        for channel_id in active_tickets.get(guild_id, []):
-            channel = guild.get_channel(channel_id)
-            if channel and user.id in [m.id for m in channel.members]:
-                await interaction.followup.send(
-                    f"❌ You already have an open ticket: {channel.mention}",
-                    ephemeral=True
-                )
-                return
+        existing_id = open_tickets_by_owner.get((guild_id, user_id))
+        channel = guild.get_channel(existing_id) if existing_id else None
+        if channel:
+            await interaction.followup.send(
+                f"❌ You already have an open ticket: {channel.mention}",
+                ephemeral=True
+            )
+            return
         
         if guild_id not in ticket_counter:
             ticket_counter[guild_id] = 0
@@ -288,38 +1421,13 @@ class TicketPanelView(discord.ui.View):
                 )
                 return
         
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            user: discord.PermissionOverwrite(
-                read_messages=True,
-                send_messages=True,
-                attach_files=True,
-                embed_links=True
-            ),
-            guild.me: discord.PermissionOverwrite(
-                read_messages=True,
-                send_messages=True,
-                manage_channels=True
-            )
-        }
-        
-        for role in guild.roles:
-            if role.permissions.administrator:
-                overwrites[role] = discord.PermissionOverwrite(
-                    read_messages=True,
-                    send_messages=True,
-                    manage_messages=True
-                )
-        
-        if guild_id in support_roles:
-            for role_id in support_roles[guild_id]:
-                role = guild.get_role(role_id)
-                if role:
-                    overwrites[role] = discord.PermissionOverwrite(
-                        read_messages=True,
-                        send_messages=True,
-                        manage_messages=True
-                    )
+        overwrites = dict(get_ticket_overwrites(guild))
+        overwrites[user] = discord.PermissionOverwrite(
+            read_messages=True,
+            send_messages=True,
+            attach_files=True,
+            embed_links=True
+        )
         
         try:
             ticket_channel = await guild.create_text_channel(
@@ -329,38 +1437,16 @@ class TicketPanelView(discord.ui.View):
                 topic=f"Ticket created by {user.display_name} ({user.id})"
             )
             
-            if guild_id not in active_tickets:
-                active_tickets[guild_id] = []
-            active_tickets[guild_id].append(ticket_channel.id)
+            track_ticket(guild_id, ticket_channel.id, user_id)
             
             ticket_cooldowns[user_id] = current_time
             
-            save_data()
-            
-            embed = discord.Embed(
-                title="🎫 Ticket Created",
-                description=f"Welcome {user.mention}! Please describe your issue and a staff member will assist you shortly.",
-                color=discord.Color.green()
-            )
-            embed.add_field(
-                name="Ticket Number",
-                value=f"#{ticket_number:04d}",
-                inline=True
-            )
-            embed.add_field(
-                name="Created By",
-                value=user.mention,
-                inline=True
-            )
-            embed.add_field(
-                name="Status",
-                value="⏳ Unclaimed",
-                inline=True
-            )
-            embed.set_footer(text="Staff: Use the buttons below to manage this ticket")
-            
+            embed = build_ticket_status_embed(ticket_number, user_id)
             view = TicketControlsView()
-            await ticket_channel.send(embed=embed, view=view)
+            status_message = await ticket_channel.send(embed=embed, view=view)
+            ticket_status_messages[ticket_channel.id] = {'message_id': status_message.id, 'number': ticket_number}
+            
+            save_data('tickets', key=guild_id)
             
             await interaction.followup.send(
                 f"✅ Ticket created: {ticket_channel.mention}",
@@ -400,7 +1486,7 @@ class TicketControlsView(discord.ui.View):
                 return
         
         ticket_claims[ticket_id] = interaction.user.id
-        save_data()
+        save_data('tickets', key=guild_id)
         
         embed = discord.Embed(
             title="✅ Ticket Claimed",
@@ -408,15 +1494,42 @@ class TicketControlsView(discord.ui.View):
             color=discord.Color.blue()
         )
         await interaction.response.send_message(embed=embed)
+        await update_ticket_status(interaction.channel)
+
+    @discord.ui.button(label="Unclaim", style=discord.ButtonStyle.secondary, custom_id="unclaim_ticket", emoji="↩️")
+    async def unclaim_ticket_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        guild_id = interaction.guild.id
+        ticket_id = interaction.channel.id
         
-        async for msg in interaction.channel.history(limit=10):
-            if msg.embeds and "Ticket Created" in msg.embeds[0].title:
-                new_embed = msg.embeds[0]
-                for i, field in enumerate(new_embed.fields):
-                    if field.name == "Status":
-                        new_embed.set_field_at(i, name="Status", value=f"✅ Claimed by {interaction.user.mention}", inline=True)
-                await msg.edit(embed=new_embed)
-                break
+        if not can_manage_tickets(interaction.user, guild_id):
+            await interaction.response.send_message(
+                "❌ You don't have permission to unclaim tickets.",
+                ephemeral=True
+            )
+            return
+        
+        claimed_by = ticket_claims.get(ticket_id)
+        if not claimed_by:
+            await interaction.response.send_message("❌ This ticket is not claimed.", ephemeral=True)
+            return
+        
+        if claimed_by != interaction.user.id and not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                f"❌ Only <@{claimed_by}> or an administrator can unclaim this ticket.",
+                ephemeral=True
+            )
+            return
+        
+        del ticket_claims[ticket_id]
+        save_data('tickets', key=guild_id)
+        
+        embed = discord.Embed(
+            title="↩️ Ticket Unclaimed",
+            description=f"{interaction.user.mention} released this ticket. Any staff member can now claim it.",
+            color=discord.Color.orange()
+        )
+        await interaction.response.send_message(embed=embed)
+        await update_ticket_status(interaction.channel)
 
     @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.danger, custom_id="close_ticket", emoji="🔒")
     async def close_ticket_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -429,42 +1542,388 @@ class TicketControlsView(discord.ui.View):
             )
             return
         
-        channel = interaction.channel
+        await close_ticket(interaction)
+
+class ModerationQueue:
+    def __init__(self, window: float, max_concurrency: int):
+        self.window = window
+        self.max_concurrency = max_concurrency
+        self.deletions = {}
+        self.notices = {}
+        self.timeouts = {}
+        self.removals = {}
+        self.dms = {}
+        self.flush_task = None
+        self.limiter = None
+        self.messages_deleted = 0
+        self.bulk_calls = 0
+        self.notices_posted = 0
+        self.actions_run = 0
+
+    def delete(self, message: discord.Message):
+        if message.channel.id not in self.deletions:
+            self.deletions[message.channel.id] = (message.channel, {})
+        self.deletions[message.channel.id][1][message.id] = message
+        self._schedule_flush()
+
+    def notice(self, channel, kind: str, member, minutes: int = None):
+        key = (channel.id, kind)
+        if key not in self.notices:
+            self.notices[key] = {'channel': channel, 'kind': kind, 'members': {}, 'count': 0, 'minutes': minutes}
+        entry = self.notices[key]
+        entry['members'][member.id] = member.mention
+        entry['count'] += 1
+        self._schedule_flush()
+
+    def timeout(self, member: discord.Member, until: datetime.datetime, reason: str):
+        key = (member.guild.id, member.id)
+        if key not in self.timeouts or until > self.timeouts[key][1]:
+            self.timeouts[key] = (member, until, reason)
+        self._schedule_flush()
+
+    def kick(self, member: discord.Member, reason: str):
+        key = (member.guild.id, member.id)
+        if key not in self.removals:
+            self.removals[key] = ('kick', member, reason)
+        self._schedule_flush()
+
+    def ban(self, member: discord.Member, reason: str):
+        self.removals[(member.guild.id, member.id)] = ('ban', member, reason)
+        self._schedule_flush()
+
+    def dm(self, member, embed: discord.Embed):
+        self.dms[member.id] = (member, embed)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def close(self):
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        await self.flush()
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        deletions, self.deletions = self.deletions, {}
+        notices, self.notices = self.notices, {}
+        timeouts, self.timeouts = self.timeouts, {}
+        removals, self.removals = self.removals, {}
+        dms, self.dms = self.dms, {}
         
-        if guild_id in active_tickets and channel.id in active_tickets[guild_id]:
+        if self.limiter is None:
+            self.limiter = asyncio.Semaphore(self.max_concurrency)
+        
+        actions = [
+            lambda member=member, until=until, reason=reason: member.timeout(until, reason=reason)
+            for key, (member, until, reason) in timeouts.items()
+            if key not in removals
+        ]
+        actions.extend(lambda member=member, embed=embed: member.send(embed=embed) for member, embed in dms.values())
+        
+        results = await asyncio.gather(
+            *(self._bulk_delete(channel, list(messages.values())) for channel, messages in deletions.values()),
+            *(self._run(lambda entry=entry: entry['channel'].send(embed=self._notice_embed(entry), delete_after=5 if entry['kind'] == 'curse' else 10)) for entry in notices.values()),
+            *(self._run(action) for action in actions)
+        )
+        self.notices_posted += sum(results[len(deletions):len(deletions) + len(notices)])
+        
+        await asyncio.gather(*(
+            self._run(lambda member=member, action=action, reason=reason: getattr(member, action)(reason=reason))
+            for action, member, reason in removals.values()
+        ))
+
+    async def _bulk_delete(self, channel, messages: list):
+        for i in range(0, len(messages), 100):
+            chunk = messages[i:i + 100]
+            if len(chunk) == 1 or not hasattr(channel, 'delete_messages'):
+                results = await asyncio.gather(*(self._run(message.delete) for message in chunk))
+                self.messages_deleted += sum(results)
+            elif await self._run(lambda chunk=chunk: channel.delete_messages(chunk, reason="Auto-moderation")):
+                self.bulk_calls += 1
+                self.messages_deleted += len(chunk)
+
+    async def _run(self, action) -> bool:
+        async with self.limiter:
+            try:
+                await action()
+            except discord.NotFound:
+                return False
+            except discord.Forbidden:
+                return False
+            except Exception as e:
+                print(f"Error running moderation action: {e}")
+                return False
+            self.actions_run += 1
+            return True
+
+    def _notice_embed(self, entry: dict) -> discord.Embed:
+        mentions = list(entry['members'].values())
+        mention_text = ", ".join(mentions[:20])
+        if len(mentions) > 20:
+            mention_text += f" and {len(mentions) - 20} more"
+        
+        if entry['kind'] == 'curse':
+            embed = discord.Embed(
+                title="⚠️ Inappropriate Language Detected",
+                description=f"{mention_text}, please keep the chat clean and respectful.",
+                color=discord.Color.orange()
+            )
+            bot_name = bot.user.name if bot.user else "Bot"
+            embed.set_footer(text=f"{entry['count']} message(s) deleted by {bot_name}")
+        elif entry['kind'] == 'raid':
             embed = discord.Embed(
-                title="🔒 Closing Ticket",
-                description="This ticket will be deleted in 5 seconds...",
+                title="🚨 Raid Protection",
+                description=f"Removed duplicate messages and timed out {len(mentions)} account(s): {mention_text}",
                 color=discord.Color.red()
             )
-            embed.set_footer(text=f"Closed by {interaction.user.display_name}")
-            
-            await interaction.response.send_message(embed=embed)
-            
-            active_tickets[guild_id].remove(channel.id)
-            if channel.id in ticket_claims:
-                del ticket_claims[channel.id]
-            save_data()
-            
-            await asyncio.sleep(5)
-            await channel.delete(reason=f"Ticket closed by {interaction.user.display_name}")
         else:
-            await interaction.response.send_message("❌ This is not an active ticket channel.", ephemeral=True)
+            embed = discord.Embed(
+                title="🚫 Anti-Spam Protection",
+                description=f"{mention_text} {'has' if len(mentions) == 1 else 'have'} been timed out for spamming.",
+                color=discord.Color.red()
+            )
+        
+        if entry['minutes']:
+            embed.add_field(
+                name="Duration",
+                value=f"{entry['minutes']} minutes",
+                inline=False
+            )
+        return embed
+
+moderation_queue = ModerationQueue(MODERATION_BATCH_WINDOW, MODERATION_MAX_CONCURRENCY)
+
+class SpamWindow:
+    __slots__ = ('times', 'index', 'count', 'last_seen')
+
+    def __init__(self, size: int):
+        self.times = array('d', bytes(8 * size))
+        self.index = 0
+        self.count = 0
+        self.last_seen = 0.0
+
+class SpamTracker:
+    def __init__(self, threshold: int, window: float, idle_seconds: float, max_entries: int):
+        self.threshold = threshold
+        self.window = window
+        self.idle_seconds = idle_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.evicted = 0
+
+    def record(self, guild_id: int, user_id: int) -> bool:
+        now = time.monotonic()
+        key = (guild_id, user_id)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = SpamWindow(self.threshold)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.entries.move_to_end(key)
+        
+        entry.last_seen = now
+        entry.times[entry.index] = now
+        entry.index = (entry.index + 1) % self.threshold
+        entry.count = min(entry.count + 1, self.threshold)
+        
+        if entry.count == self.threshold and now - entry.times[entry.index] <= self.window:
+            entry.count = 0
+            return True
+        return False
+
+    def sweep(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        while self.entries:
+            key, entry = next(iter(self.entries.items()))
+            if entry.last_seen > cutoff:
+                break
+            del self.entries[key]
+            self.evicted += 1
+
+    def memory_bytes(self) -> int:
+        sample = SpamWindow(self.threshold)
+        per_entry = sys.getsizeof(sample) + sys.getsizeof(sample.times) + sys.getsizeof((0, 0)) + 2 * sys.getsizeof(2 ** 62)
+        return sys.getsizeof(self.entries) + len(self.entries) * per_entry
+
+spam_tracker = SpamTracker(SPAM_THRESHOLD, SPAM_COOLDOWN, SPAM_IDLE_SECONDS, SPAM_TRACKER_MAX_ENTRIES)
+
+class RaidCluster:
+    __slots__ = ('messages', 'users', 'user_channels', 'channel_spread', 'flagged', 'warned')
+
+    def __init__(self):
+        self.messages = deque()
+        self.users = {}
+        self.user_channels = {}
+        self.channel_spread = {}
+        self.flagged = False
+        self.warned = set()
+
+class RaidDetector:
+    def __init__(self, window: float, max_tracked: int):
+        self.window = window
+        self.max_tracked = max_tracked
+        self.guilds = {}
+        self.raids_detected = 0
+
+    @staticmethod
+    def fingerprint(content: str):
+        text = RAID_STRIP_PATTERN.sub("", content.casefold())
+        if len(text) < RAID_MIN_CONTENT_LENGTH:
+            return None
+        return hash(text)
+
+    @staticmethod
+    def exempt(member) -> bool:
+        if not isinstance(member, discord.Member):
+            return False
+        permissions = member.guild_permissions
+        return permissions.manage_messages or permissions.moderate_members
+
+    @staticmethod
+    def suspicious(message: discord.Message) -> bool:
+        if message.mention_everyone or message.mentions or message.role_mentions:
+            return True
+        if RAID_LINK_PATTERN.search(message.content):
+            return True
+        now = discord.utils.utcnow()
+        author = message.author
+        if now - author.created_at < datetime.timedelta(days=RAID_NEW_ACCOUNT_DAYS):
+            return True
+        joined_at = getattr(author, 'joined_at', None)
+        return joined_at is not None and now - joined_at < datetime.timedelta(hours=RAID_NEW_MEMBER_HOURS)
+
+    def record(self, message: discord.Message, fingerprint: int, min_users: int, min_channels: int) -> tuple:
+        now = time.monotonic()
+        state = self.guilds.get(message.guild.id)
+        if state is None:
+            state = self.guilds[message.guild.id] = (deque(), {})
+        recent, clusters = state
+        
+        cutoff = now - self.window
+        while recent and (recent[0][0] < cutoff or len(recent) >= self.max_tracked):
+            self._expire(recent, clusters)
+        
+        cluster = clusters.get(fingerprint)
+        if cluster is None:
+            cluster = clusters[fingerprint] = RaidCluster()
+        
+        user_id = message.author.id
+        channel_key = (user_id, message.channel.id)
+        recent.append((now, fingerprint))
+        cluster.messages.append(message)
+        cluster.users[user_id] = cluster.users.get(user_id, 0) + 1
+        if channel_key not in cluster.user_channels:
+            cluster.user_channels[channel_key] = 0
+            cluster.channel_spread[user_id] = cluster.channel_spread.get(user_id, 0) + 1
+        cluster.user_channels[channel_key] += 1
+        
+        if cluster.flagged:
+            return [message], cluster.warned
+        
+        if len(cluster.users) >= min_users or cluster.channel_spread[user_id] >= min_channels:
+            cluster.flagged = True
+            self.raids_detected += 1
+            return list(cluster.messages), cluster.warned
+        return [], cluster.warned
+
+    def _expire(self, recent: deque, clusters: dict):
+        _, fingerprint = recent.popleft()
+        cluster = clusters[fingerprint]
+        message = cluster.messages.popleft()
+        user_id = message.author.id
+        channel_key = (user_id, message.channel.id)
+        
+        cluster.users[user_id] -= 1
+        if not cluster.users[user_id]:
+            del cluster.users[user_id]
+        cluster.user_channels[channel_key] -= 1
+        if not cluster.user_channels[channel_key]:
+            del cluster.user_channels[channel_key]
+            cluster.channel_spread[user_id] -= 1
+            if not cluster.channel_spread[user_id]:
+                del cluster.channel_spread[user_id]
+        if not cluster.messages:
+            del clusters[fingerprint]
+
+    def sweep(self):
+        cutoff = time.monotonic() - self.window
+        for guild_id in list(self.guilds):
+            recent, clusters = self.guilds[guild_id]
+            while recent and recent[0][0] < cutoff:
+                self._expire(recent, clusters)
+            if not recent:
+                del self.guilds[guild_id]
+
+raid_detector = RaidDetector(RAID_WINDOW_SECONDS, RAID_MAX_TRACKED_PER_GUILD)
+
+def handle_raid(offenders: list, config: GuildConfig, warned: set):
+    spam_timeout_minutes = config.spam_timeout_minutes
+    timeout_until = discord.utils.utcnow() + datetime.timedelta(minutes=spam_timeout_minutes)
+    
+    for offender in offenders:
+        moderation_queue.delete(offender)
+        member = offender.author
+        if isinstance(member, discord.Member) and not member.is_timed_out() and member.id not in warned:
+            warned.add(member.id)
+            moderation_queue.timeout(member, timeout_until, "Raid: duplicate message spam")
+            moderation_queue.notice(offender.channel, 'raid', member, spam_timeout_minutes)
+            record_automod_warning(member, config, "Raid: duplicate message spam")
 
 @bot.event
 async def on_ready():
-    bot.start_time = discord.utils.utcnow()
     print(f'Bot is ready. Logged in as: {bot.user}')
     print(f'Bot ID: {bot.user.id}')
     print(f'Connected to {len(bot.guilds)} guild(s)')
-    if not openai_client:
+    if bot.ready_once:
+        return
+    
+    bot.ready_once = True
+    bot.start_time = discord.utils.utcnow()
+    print(f"Startup: gateway READY {time.monotonic() - PROCESS_STARTED_AT:.2f}s after process start")
+    if not OPENAI_API_KEY:
         print("⚠️  Warning: OPENAI_API_KEY not found. AI commands will not work.")
-    load_data()
-    print("Command data loaded.")
+    index_ticket_topics()
+    resume_broadcasts()
+
+@bot.event
+async def on_guild_channel_create(channel):
+    muted_role = discord.utils.get(channel.guild.roles, name=DEFAULT_MUTED_ROLE_NAME)
+    if not muted_role:
+        return
     
-    bot.add_view(TicketPanelView())
-    bot.add_view(TicketControlsView())
-    print("Ticket views registered.")
+    try:
+        await apply_muted_overwrite(channel, muted_role)
+    except Exception as e:
+        print(f"Error setting Muted overwrite on new channel #{channel.name} in {channel.guild.name}: {e}")
+
+@bot.event
+async def on_guild_role_create(role):
+    if role.permissions.administrator:
+        ticket_overwrite_templates.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.permissions.administrator != after.permissions.administrator:
+        ticket_overwrite_templates.pop(after.guild.id, None)
+
+@bot.event
+async def on_guild_role_delete(role):
+    ticket_overwrite_templates.pop(role.guild.id, None)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    untrack_ticket(channel.guild.id, channel.id)
 
 @bot.event
 async def on_message(message):
@@ -475,24 +1934,24 @@ async def on_message(message):
     if not guild_id:
         return
     
-    config = get_server_config(guild_id)
+    config = get_guild_config(guild_id)
 
-    if config['features'].get('cursing') and message.guild:
-        if BAD_WORDS_PATTERN.search(message.content):
-            try:
-                await message.delete()
-                embed = discord.Embed(
-                    title="⚠️ Inappropriate Language Detected",
-                    description=f"{message.author.mention}, please keep the chat clean and respectful.",
-                    color=discord.Color.orange()
-                )
-                bot_name = bot.user.name if bot.user else "Bot"
-                embed.set_footer(text=f"Message deleted by {bot_name}")
-                await message.channel.send(embed=embed, delete_after=5)
+    if config.raids and message.content and not RaidDetector.exempt(message.author):
+        fingerprint = RaidDetector.fingerprint(message.content)
+        if fingerprint is not None and RaidDetector.suspicious(message):
+            offenders, warned = raid_detector.record(message, fingerprint, config.raid_min_users, config.raid_min_channels)
+            if offenders:
+                handle_raid(offenders, config, warned)
+                return
 
-                curse_timeout_minutes = config.get('curse_timeout_minutes', 5)
+    if config.cursing and message.guild:
+        if config.matcher.search(message.content):
+            try:
+                curse_timeout_minutes = config.curse_timeout_minutes
                 timeout_until = discord.utils.utcnow() + datetime.timedelta(minutes=curse_timeout_minutes)
-                await message.author.timeout(timeout_until, reason="Using inappropriate language")
+                moderation_queue.delete(message)
+                moderation_queue.notice(message.channel, 'curse', message.author)
+                moderation_queue.timeout(message.author, timeout_until, "Using inappropriate language")
 
                 dm_embed = discord.Embed(
                     title="🚫 Timeout Notice",
@@ -504,52 +1963,317 @@ async def on_message(message):
                     value=f"{curse_timeout_minutes} minutes",
                     inline=False
                 )
-                try:
-                    await message.author.send(embed=dm_embed)
-                except:
-                    pass
+                moderation_queue.dm(message.author, dm_embed)
+                record_automod_warning(message.author, config, "Using inappropriate language")
             except Exception as e:
                 print(f"Error handling bad words: {e}")
 
-    if config['features'].get('spamming') and message.guild:
-        user_id = message.author.id
-        current_time = datetime.datetime.now()
-
-        if user_id not in user_messages:
-            user_messages[user_id] = deque(maxlen=SPAM_THRESHOLD)
-
-        user_messages[user_id].append(current_time)
-
-        if len(user_messages[user_id]) == SPAM_THRESHOLD:
-            time_diff = (current_time - user_messages[user_id][0]).total_seconds()
-
-            if time_diff <= SPAM_COOLDOWN:
+    if config.spamming and message.guild:
+        if spam_tracker.record(guild_id, message.author.id):
+            try:
+                spam_timeout_minutes = config.spam_timeout_minutes
+                timeout_until = discord.utils.utcnow() + datetime.timedelta(minutes=spam_timeout_minutes)
+                moderation_queue.timeout(message.author, timeout_until, "Spamming messages")
+                moderation_queue.notice(message.channel, 'spam', message.author, spam_timeout_minutes)
+                record_automod_warning(message.author, config, "Spamming messages")
+            except Exception as e:
+                print(f"Error handling spam: {e}")
+
+class AIResponseCache:
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt: str, ai_type: str, max_tokens: int, temperature: float) -> tuple:
+        return (" ".join(prompt.casefold().split()), ai_type, max_tokens, round(temperature, 2))
+
+    def get(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        answer, ai_provider, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            self.misses += 1
+            return None
+        
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return answer, ai_provider
+
+    def set(self, key: tuple, answer: str, ai_provider: str):
+        self.entries[key] = (answer, ai_provider, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+ai_cache = AIResponseCache(AI_CACHE_TTL, AI_CACHE_SIZE)
+
+class ProviderLimiter:
+    def __init__(self, name: str, max_in_flight: int):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.queues = OrderedDict()
+        self.queued = 0
+        self.max_queue_depth = 0
+        self.served = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, guild_id: int, on_queued=None):
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self._record_wait(0.0)
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        if guild_id not in self.queues:
+            self.queues[guild_id] = deque()
+        self.queues[guild_id].append(future)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        started = time.monotonic()
+        
+        try:
+            if on_queued:
                 try:
-                    spam_timeout_minutes = config.get('spam_timeout_minutes', 10)
-                    timeout_until = discord.utils.utcnow() + datetime.timedelta(minutes=spam_timeout_minutes)
-                    await message.author.timeout(timeout_until, reason="Spamming messages")
-
-                    embed = discord.Embed(
-                        title="🚫 Anti-Spam Protection",
-                        description=f"{message.author.mention} has been timed out for spamming.",
-                        color=discord.Color.red()
-                    )
-                    embed.add_field(
-                        name="Duration",
-                        value=f"{spam_timeout_minutes} minutes",
-                        inline=False
-                    )
-                    await message.channel.send(embed=embed, delete_after=10)
-
-                    user_messages[user_id].clear()
+                    await on_queued(self._position(guild_id))
                 except Exception as e:
-                    print(f"Error handling spam: {e}")
+                    print(f"Error notifying queued request: {e}")
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(guild_id, future)
+            raise
+        
+        self._record_wait(time.monotonic() - started)
+
+    def release(self):
+        self.in_flight -= 1
+        while self.queues and self.in_flight < self.max_in_flight:
+            guild_id, queue = next(iter(self.queues.items()))
+            future = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self.queues.move_to_end(guild_id)
+            else:
+                del self.queues[guild_id]
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, guild_id: int, on_queued=None):
+        await self.acquire(guild_id, on_queued)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _position(self, guild_id: int) -> int:
+        rounds = len(self.queues[guild_id]) - 1
+        ahead = rounds
+        before_guild = True
+        for other_id, queue in self.queues.items():
+            if other_id == guild_id:
+                before_guild = False
+                continue
+            ahead += min(len(queue), rounds)
+            if before_guild and len(queue) > rounds:
+                ahead += 1
+        return ahead + 1
+
+    def _discard(self, guild_id: int, future: asyncio.Future):
+        queue = self.queues.get(guild_id)
+        if queue and future in queue:
+            queue.remove(future)
+            self.queued -= 1
+            if not queue:
+                del self.queues[guild_id]
+
+    def _record_wait(self, waited: float):
+        self.served += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+ai_limiters = {
+    'OpenAI': ProviderLimiter('OpenAI', OPENAI_MAX_IN_FLIGHT),
+    'Gemini': ProviderLimiter('Gemini', GEMINI_MAX_WORKERS)
+}
+
+class TokenBucket:
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+class TokenBucketLimiter:
+    def __init__(self):
+        self.buckets = OrderedDict()
+
+    def consume(self, key, amount: int, capacity: int) -> float:
+        now = time.monotonic()
+        rate = capacity / 60
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(capacity, now)
+        else:
+            bucket.tokens = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+            bucket.updated = now
+            self.buckets.move_to_end(key)
+        
+        if bucket.tokens >= amount:
+            bucket.tokens -= amount
+            return 0.0
+        return (amount - bucket.tokens) / rate
+
+    def refund(self, key, amount: int):
+        bucket = self.buckets.get(key)
+        if bucket:
+            bucket.tokens += amount
+
+    def evict_idle(self, idle_seconds: float):
+        cutoff = time.monotonic() - idle_seconds
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if bucket.updated > cutoff:
+                break
+            del self.buckets[key]
+
+ai_user_buckets = TokenBucketLimiter()
+ai_guild_buckets = TokenBucketLimiter()
+
+def _check_ai_rate_limit(guild_id: int, user_id: int, tokens: int) -> float:
+    config = get_guild_config(guild_id) if guild_id else DEFAULT_GUILD_CONFIG
+    user_capacity = config.ai_user_tokens_per_minute
+    guild_capacity = config.ai_guild_tokens_per_minute
+    
+    retry_after = ai_user_buckets.consume((guild_id, user_id), tokens, user_capacity)
+    if retry_after:
+        return retry_after
+    
+    retry_after = ai_guild_buckets.consume(guild_id, tokens, guild_capacity)
+    if retry_after:
+        ai_user_buckets.refund((guild_id, user_id), tokens)
+    return retry_after
 
 def _check_ai_config(interaction):
-    if not openai_client and not gemini_client:
+    if not OPENAI_API_KEY and not GEMINI_API_KEY:
         return False
     return True
 
+async def _generate_gemini(prompt: str) -> str:
+    model = genai.GenerativeModel("gemini-pro")
+    request_options = {'timeout': GEMINI_TIMEOUT}
+    if hasattr(model, "generate_content_async"):
+        request = model.generate_content_async(prompt, request_options=request_options)
+    else:
+        loop = asyncio.get_running_loop()
+        request = loop.run_in_executor(gemini_executor, lambda: model.generate_content(prompt, request_options=request_options))
+    response = await asyncio.wait_for(request, timeout=GEMINI_TIMEOUT + 5)
+    return response.text
+
+def _build_ai_embed(interaction: discord.Interaction, answer: str, ai_type: str, ai_provider: str, streaming: bool = False, interrupted: bool = False) -> discord.Embed:
+    was_truncated = False
+    if len(answer) > MAX_EMBED_LENGTH - 100:
+        answer = answer[:MAX_EMBED_LENGTH - 103] + "..."
+        was_truncated = True
+
+    if ai_type == 'ask':
+        color = discord.Color.blue()
+    elif ai_type == 'generate':
+        color = discord.Color.purple()
+    elif ai_type == 'prompt':
+        color = discord.Color.green()
+    else:
+        color = discord.Color.default()
+
+    embed = discord.Embed(
+        description=answer + (" ▌" if streaming else ""),
+        color=color
+    )
+    footer = f"Prompted by {interaction.user.display_name} • {ai_provider}"
+    if streaming:
+        footer += " • Generating..."
+    embed.set_footer(text=footer)
+
+    if was_truncated:
+        embed.add_field(
+            name="⚠️ Note",
+            value="Response was truncated due to length limit",
+            inline=False
+        )
+
+    if interrupted:
+        embed.add_field(
+            name="⚠️ Incomplete",
+            value="The connection to the AI was interrupted, so this response may be cut off",
+            inline=False
+        )
+
+    return embed
+
+async def _stream_openai(interaction: discord.Interaction, prompt: str, ai_type: str, max_tokens: int, temperature: float, response_msg=None):
+    stream = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        stream=True
+    )
+    
+    loop = asyncio.get_running_loop()
+    parts = []
+    length = 0
+    streamed = False
+    interrupted = False
+    last_edit = 0.0
+    
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            
+            parts.append(delta)
+            length += len(delta)
+            if length > MAX_EMBED_LENGTH - 100:
+                break
+            
+            now = loop.time()
+            if not streamed or now - last_edit >= STREAM_EDIT_INTERVAL:
+                embed = _build_ai_embed(interaction, "".join(parts), ai_type, "OpenAI", streaming=True)
+                if response_msg is None:
+                    response_msg = await interaction.followup.send(embed=embed)
+                else:
+                    await response_msg.edit(embed=embed)
+                streamed = True
+                last_edit = now
+    except Exception as e:
+        if not streamed:
+            raise
+        print(f"OpenAI stream interrupted: {e}")
+        interrupted = True
+    finally:
+        await stream.close()
+    
+    return "".join(parts), response_msg, interrupted
+
 async def _send_ai_response(interaction: discord.Interaction, prompt: str, ai_type: str, max_tokens: int, temperature: float):
     if not _check_ai_config(interaction):
         embed = discord.Embed(
@@ -560,94 +2284,130 @@ async def _send_ai_response(interaction: discord.Interaction, prompt: str, ai_ty
         await interaction.response.send_message(embed=embed, ephemeral=True)
         return
 
-    await interaction.response.defer()
-    
     answer = None
     ai_provider = None
+    response_msg = None
+    from_cache = False
+    interrupted = False
+    guild_id = interaction.guild_id
+    
+    async def send_or_edit(embed: discord.Embed):
+        nonlocal response_msg
+        if response_msg:
+            await response_msg.edit(embed=embed)
+        else:
+            response_msg = await interaction.followup.send(embed=embed)
+    
+    async def notify_queued(position: int):
+        embed = discord.Embed(
+            description=f"⏳ The AI is busy right now. You are **#{position}** in the queue, your answer will appear here shortly.",
+            color=discord.Color.orange()
+        )
+        await send_or_edit(embed)
+    
+    use_cache = get_guild_config(guild_id).ai_cache if guild_id else True
+    cache_key = AIResponseCache.make_key(prompt, ai_type, max_tokens, temperature)
+    
+    if use_cache:
+        cached = ai_cache.get(cache_key)
+        if cached:
+            answer, ai_provider = cached
+            from_cache = True
+    
+    if not from_cache:
+        config = get_guild_config(guild_id) if guild_id else DEFAULT_GUILD_CONFIG
+        allowance = min(config.ai_user_tokens_per_minute, config.ai_guild_tokens_per_minute)
+        if max_tokens > allowance:
+            await interaction.response.send_message(
+                f"❌ This request can use up to {max_tokens} tokens, but this server allows at most {allowance} AI tokens per minute. "
+                "Use a smaller `max_tokens` or ask an administrator to raise the limit with `/config`.",
+                ephemeral=True
+            )
+            return
+        
+        retry_after = _check_ai_rate_limit(guild_id, interaction.user.id, max_tokens)
+        if retry_after:
+            await interaction.response.send_message(
+                f"⏱️ You're using the AI too quickly. Please try again in {int(retry_after) + 1} seconds.",
+                ephemeral=True
+            )
+            return
+
+    await interaction.response.defer()
 
-    if openai_client:
+    if not answer and await get_openai_client():
         try:
-            response = await openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-            answer = response.choices[0].message.content or "No response generated"
+            async with ai_limiters['OpenAI'].slot(guild_id, notify_queued):
+                if AI_STREAMING:
+                    answer, response_msg, interrupted = await _stream_openai(interaction, prompt, ai_type, max_tokens, temperature, response_msg)
+                    answer = answer or "No response generated"
+                else:
+                    response = await openai_client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature
+                    )
+                    answer = response.choices[0].message.content or "No response generated"
             ai_provider = "OpenAI"
         except Exception as e:
             print(f"OpenAI API Error: {e}")
-            if not gemini_client:
+            if not GEMINI_API_KEY:
                 embed = discord.Embed(
                     title="❌ Error",
                     description=f"Failed to generate response with OpenAI: {str(e)}",
                     color=discord.Color.red()
                 )
-                await interaction.followup.send(embed=embed)
+                await send_or_edit(embed)
                 return
 
-    if not answer and gemini_client and GENAI_AVAILABLE:
+    if not answer and await get_genai():
         try:
-            model = genai.GenerativeModel("gemini-pro")
-            response = model.generate_content(prompt)
-            answer = response.text or "No response generated"
+            async with ai_limiters['Gemini'].slot(guild_id, notify_queued):
+                answer = await _generate_gemini(prompt) or "No response generated"
             ai_provider = "Gemini"
+        except asyncio.TimeoutError:
+            embed = discord.Embed(
+                title="❌ Error",
+                description=f"Gemini did not respond within {GEMINI_TIMEOUT} seconds. Please try again later.",
+                color=discord.Color.red()
+            )
+            await send_or_edit(embed)
+            print(f"Gemini API Error: timed out after {GEMINI_TIMEOUT}s")
+            return
         except Exception as e:
             embed = discord.Embed(
                 title="❌ Error",
                 description=f"Failed to generate response with Gemini: {str(e)}",
                 color=discord.Color.red()
             )
-            await interaction.followup.send(embed=embed)
+            await send_or_edit(embed)
             print(f"Gemini API Error: {e}")
             return
 
     if not answer:
-        return
-
-    was_truncated = False
-    if len(answer) > MAX_EMBED_LENGTH - 100:
-        answer = answer[:MAX_EMBED_LENGTH - 103] + "..."
-        was_truncated = True
-
-    if ai_type == 'ask':
-        color = discord.Color.blue()
-    elif ai_type == 'generate':
-        color = discord.Color.purple()
-    elif ai_type == 'prompt':
-        color = discord.Color.green()
-    else:
-        color = discord.Color.default()
-
-    embed = discord.Embed(
-        description=answer,
-        color=color
-    )
-    embed.set_footer(text=f"Prompted by {interaction.user.display_name} • {ai_provider}")
-
-    if was_truncated:
-        embed.add_field(
-            name="⚠️ Note",
-            value="Response was truncated due to length limit",
-            inline=False
+        embed = discord.Embed(
+            title="❌ Error",
+            description="No AI provider is available right now. Please contact the bot administrator.",
+            color=discord.Color.red()
         )
+        await send_or_edit(embed)
+        return
+    
+    if from_cache:
+        ai_provider = f"{ai_provider} (cached)"
+    elif use_cache and not interrupted and answer != "No response generated":
+        ai_cache.set(cache_key, answer, ai_provider)
 
-    response_msg = await interaction.followup.send(embed=embed)
-
-    channel_id = interaction.channel_id
-    message_id = response_msg.id
-
-    if channel_id not in prompt_messages:
-        prompt_messages[channel_id] = {}
+    await send_or_edit(_build_ai_embed(interaction, answer, ai_type, ai_provider, interrupted=interrupted))
 
-    prompt_messages[channel_id][message_id] = {
+    record_prompt_message(interaction.channel_id, response_msg.id, {
         'type': ai_type,
         'user_id': interaction.user.id,
         'prompt': prompt
-    }
-    save_data()
+    })
 
 @bot.tree.command(name="feature", description="Enable or disable bot features (Admin only)")
 @app_commands.describe(
@@ -663,14 +2423,15 @@ async def _send_ai_response(interaction: discord.Interaction, prompt: str, ai_ty
     app_commands.Choice(name="Spam Detection", value="spamming"),
     app_commands.Choice(name="DM Commands", value="dm"),
     app_commands.Choice(name="Warn Command", value="warn"),
+    app_commands.Choice(name="AI Response Cache", value="ai_cache"),
+    app_commands.Choice(name="Raid Detection", value="raids"),
 ])
 @app_commands.checks.has_permissions(administrator=True)
 async def feature(interaction: discord.Interaction, feature: str, enabled: bool):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    
-    config['features'][feature] = enabled
-    save_data()
+    features = get_guild_config(guild_id).features()
+    features[feature] = enabled
+    update_guild_config(guild_id, features=features)
     
     status = "enabled" if enabled else "disabled"
     emoji = "✅" if enabled else "❌"
@@ -687,34 +2448,40 @@ async def feature(interaction: discord.Interaction, feature: str, enabled: bool)
 @bot.tree.command(name="config", description="Configure bot settings (Admin only)")
 @app_commands.describe(
     setting="The setting to configure",
-    value="The value in minutes"
+    value="The value (minutes for timeouts, tokens per minute for AI limits, counts for raid thresholds)"
 )
 @app_commands.choices(setting=[
     app_commands.Choice(name="Spam Timeout Duration", value="spam_timeout"),
     app_commands.Choice(name="Curse Timeout Duration", value="curse_timeout"),
+    app_commands.Choice(name="AI Tokens per Minute (Per User)", value="ai_user_tokens"),
+    app_commands.Choice(name="AI Tokens per Minute (Server)", value="ai_guild_tokens"),
+    app_commands.Choice(name="Raid Threshold (Users)", value="raid_users"),
+    app_commands.Choice(name="Raid Threshold (Channels)", value="raid_channels"),
 ])
 @app_commands.checks.has_permissions(administrator=True)
 async def config(interaction: discord.Interaction, setting: str, value: int):
-    if value < 1 or value > 10080:
-        await interaction.response.send_message("❌ Value must be between 1 and 10080 minutes (1 week).", ephemeral=True)
-        return
-    
-    guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    
-    setting_name = "Unknown Setting"
-    if setting == "spam_timeout":
-        config['spam_timeout_minutes'] = value
-        setting_name = "Spam Timeout Duration"
-    elif setting == "curse_timeout":
-        config['curse_timeout_minutes'] = value
-        setting_name = "Curse Timeout Duration"
+    if setting in ("ai_user_tokens", "ai_guild_tokens"):
+        if value < 1 or value > 1000000:
+            await interaction.response.send_message("❌ Value must be between 1 and 1000000 tokens per minute.", ephemeral=True)
+            return
+        unit = "tokens per minute"
+    elif setting in ("raid_users", "raid_channels"):
+        if value < 2 or value > RAID_MAX_THRESHOLD:
+            await interaction.response.send_message(f"❌ Value must be between 2 and {RAID_MAX_THRESHOLD}.", ephemeral=True)
+            return
+        unit = "users" if setting == "raid_users" else "channels"
+    else:
+        if value < 1 or value > 10080:
+            await interaction.response.send_message("❌ Value must be between 1 and 10080 minutes (1 week).", ephemeral=True)
+            return
+        unit = "minutes"
     
-    save_data()
+    setting_key, setting_name = CONFIG_SETTINGS[setting]
+    update_guild_config(interaction.guild.id, **{setting_key: value})
     
     embed = discord.Embed(
         title="⚙️ Configuration Updated",
-        description=f"**{setting_name}** has been set to **{value} minutes**.",
+        description=f"**{setting_name}** has been set to **{value} {unit}**.",
         color=discord.Color.blue()
     )
     embed.set_footer(text=f"Changed by {interaction.user.display_name}")
@@ -733,7 +2500,7 @@ async def mute(interaction: discord.Interaction, member: discord.Member, reason:
         await interaction.response.send_message("❌ You cannot mute an administrator.", ephemeral=True)
         return
     
-    muted_role = await get_or_create_muted_role(interaction.guild)
+    muted_role = await get_or_create_muted_role(interaction.guild, interaction)
     
     if not muted_role:
         await interaction.response.send_message("❌ Failed to create or find the Muted role.", ephemeral=True)
@@ -767,15 +2534,13 @@ async def mute(interaction: discord.Interaction, member: discord.Member, reason:
         if duration and duration > 0:
             dm_embed.add_field(name="Duration", value=f"{duration} minutes", inline=False)
         
+        if duration and duration > 0:
+            mute_scheduler.schedule(interaction.guild.id, member.id, time.time() + duration * 60)
+        
         try:
             await member.send(embed=dm_embed)
         except:
             pass
-        
-        if duration and duration > 0:
-            await asyncio.sleep(duration * 60)
-            if muted_role in member.roles:
-                await member.remove_roles(muted_role, reason="Mute duration expired")
                 
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to mute {member.mention}: {e}", ephemeral=True)
@@ -798,6 +2563,7 @@ async def unmute(interaction: discord.Interaction, member: discord.Member):
     
     try:
         await member.remove_roles(muted_role, reason=f"Unmuted by {interaction.user.display_name}")
+        mute_scheduler.cancel(interaction.guild.id, member.id)
         
         embed = discord.Embed(
             title="🔊 Member Unmuted",
@@ -895,8 +2661,7 @@ async def unban(interaction: discord.Interaction, user_id: str):
 async def info(interaction: discord.Interaction):
     guild_id = interaction.guild.id if interaction.guild else None
     if guild_id:
-        config = get_server_config(guild_id)
-        if not config['features'].get('info'):
+        if not get_guild_config(guild_id).info:
             await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
             return
     
@@ -918,7 +2683,8 @@ async def info(interaction: discord.Interaction):
             "`/unmute` - Unmute a member\n"
             "`/warn` - Issue a warning to a user\n"
             "`/clearwarnings` - Clear all warnings for a user\n"
-            "`/checkwarnings` - Check warnings for a user"
+            "`/checkwarnings` - Check warnings for a user\n"
+            "`/prompthistory` - Show a user's recent AI prompts"
         ),
         inline=False
     )
@@ -927,10 +2693,16 @@ async def info(interaction: discord.Interaction):
         name="⚙️ Configuration Commands",
         value=(
             "`/feature` - Enable/disable bot features\n"
-            "`/config` - Configure timeout durations\n"
+            "`/config` - Configure timeouts and AI rate limits\n"
             "`/addsupportrole` - Add support role for tickets\n"
             "`/removesupportrole` - Remove support role\n"
-            "`/listsupportroles` - List all support roles"
+            "`/listsupportroles` - List all support roles\n"
+            "`/filteradd` - Add a word to the chat filter\n"
+            "`/filterremove` - Remove a word from the chat filter\n"
+            "`/filterlist` - List this server's filter changes\n"
+            "`/escalationadd` - Add an automatic action at a warning count\n"
+            "`/escalationremove` - Remove an escalation step\n"
+            "`/escalationlist` - Show the escalation ladder"
         ),
         inline=False
     )
@@ -939,7 +2711,9 @@ async def info(interaction: discord.Interaction):
         name="🎫 Ticket System",
         value=(
             "`/ticketpanel` - Create ticket panel\n"
-            "`/closeticket` - Close current ticket"
+            "`/closeticket` - Close current ticket\n"
+            "`/reassignticket` - Hand current ticket to another staff member\n"
+            "`/settranscriptchannel` - Set where closed ticket transcripts are posted"
         ),
         inline=False
     )
@@ -959,7 +2733,9 @@ async def info(interaction: discord.Interaction):
         value=(
             "`/verify` - Verify yourself\n"
             "`/dm` - Send DM to a member\n"
-            "`/sync` - Sync slash commands"
+            "`/dmcancel` - Cancel a running DM broadcast\n"
+            "`/sync` - Sync slash commands\n"
+            "`/stats` - Show bot runtime statistics"
         ),
         inline=False
     )
@@ -972,8 +2748,8 @@ async def info(interaction: discord.Interaction):
 @app_commands.checks.has_permissions(kick_members=True)
 async def kick(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    if not config['features'].get('kick'):
+    config = get_guild_config(guild_id)
+    if not config.kick:
         await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
         return
     
@@ -1012,8 +2788,8 @@ async def kick(interaction: discord.Interaction, member: discord.Member, reason:
 @app_commands.checks.has_permissions(ban_members=True)
 async def ban(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    if not config['features'].get('ban'):
+    config = get_guild_config(guild_id)
+    if not config.ban:
         await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
         return
     
@@ -1057,8 +2833,8 @@ async def ban(interaction: discord.Interaction, member: discord.Member, reason:
 @app_commands.checks.has_permissions(moderate_members=True)
 async def timeout(interaction: discord.Interaction, member: discord.Member, duration: int, reason: str = "No reason provided"):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    if not config['features'].get('timeout'):
+    config = get_guild_config(guild_id)
+    if not config.timeout:
         await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
         return
     
@@ -1101,29 +2877,82 @@ async def timeout(interaction: discord.Interaction, member: discord.Member, dura
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to timeout {member.mention}: {e}", ephemeral=True)
 
+def get_warnings(guild_id: int, user_id: int) -> list:
+    return guild_warnings.get(guild_id, {}).get(user_id, [])
+
+def add_warning(guild_id: int, user_id: int, warning: dict) -> int:
+    warnings = guild_warnings.setdefault(guild_id, {}).setdefault(user_id, [])
+    warnings.append(warning)
+    pending_warning_ops.append(('add', guild_id, user_id, warning))
+    save_data('warnings', key=(guild_id, user_id))
+    return len(warnings)
+
+def clear_warnings(guild_id: int, user_id: int) -> int:
+    users = guild_warnings.get(guild_id, {})
+    warnings = users.pop(user_id, [])
+    if not users:
+        guild_warnings.pop(guild_id, None)
+    if warnings:
+        pending_warning_ops.append(('clear', guild_id, user_id, None))
+        save_data('warnings', key=(guild_id, user_id))
+    return len(warnings)
+
+def describe_escalation(step: dict) -> str:
+    if step['action'] == 'timeout':
+        return f"Timeout ({step['minutes']} minutes)"
+    return step['action'].capitalize()
+
+def escalate(member: discord.Member, warning_count: int, ladder: dict):
+    step = ladder.get(warning_count)
+    if not step:
+        return None
+    
+    reason = f"Escalation: reached {warning_count} warnings"
+    if step['action'] == 'timeout':
+        until = discord.utils.utcnow() + datetime.timedelta(minutes=step['minutes'])
+        moderation_queue.timeout(member, until, reason)
+    elif step['action'] == 'kick':
+        moderation_queue.kick(member, reason)
+    else:
+        moderation_queue.ban(member, reason)
+    
+    dm_embed = discord.Embed(
+        title="⛔ Automatic Escalation",
+        description=f"You have reached **{warning_count}** warnings in **{member.guild.name}**.",
+        color=discord.Color.dark_red()
+    )
+    dm_embed.add_field(name="Action", value=describe_escalation(step), inline=False)
+    moderation_queue.dm(member, dm_embed)
+    return step
+
+def record_automod_warning(member: discord.Member, config: GuildConfig, reason: str):
+    if not config.escalation:
+        return
+    
+    warning_data = {
+        'reason': reason,
+        'moderator': "Auto-moderation",
+        'timestamp': datetime.datetime.now().isoformat()
+    }
+    escalate(member, add_warning(member.guild.id, member.id, warning_data), config.escalation)
+
 @bot.tree.command(name="warn", description="Warn a user (Admin only)")
 @app_commands.checks.has_permissions(moderate_members=True)
 async def warn(interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    if not config['features'].get('warn'):
+    config = get_guild_config(guild_id)
+    if not config.warn:
         await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
         return
     
-    user_id = member.id
-    
-    if user_id not in user_warnings:
-        user_warnings[user_id] = []
-    
     warning_data = {
         'reason': reason,
         'moderator': interaction.user.display_name,
-        'timestamp': datetime.datetime.now().isoformat(),
-        'guild_id': guild_id
+        'timestamp': datetime.datetime.now().isoformat()
     }
     
-    user_warnings[user_id].append(warning_data)
-    warning_count = len(user_warnings[user_id])
+    warning_count = add_warning(guild_id, member.id, warning_data)
+    step = escalate(member, warning_count, config.escalation)
     
     embed = discord.Embed(
         title="⚠️ User Warned",
@@ -1132,6 +2961,8 @@ async def warn(interaction: discord.Interaction, member: discord.Member, reason:
     )
     embed.add_field(name="Reason", value=reason, inline=False)
     embed.add_field(name="Total Warnings", value=str(warning_count), inline=True)
+    if step:
+        embed.add_field(name="Escalation", value=describe_escalation(step), inline=True)
     embed.set_footer(text=f"Warned by {interaction.user.display_name}")
     
     await interaction.response.send_message(embed=embed)
@@ -1152,15 +2983,12 @@ async def warn(interaction: discord.Interaction, member: discord.Member, reason:
 @bot.tree.command(name="clearwarnings", description="Clear all warnings for a user (Admin only)")
 @app_commands.checks.has_permissions(moderate_members=True)
 async def clearwarnings(interaction: discord.Interaction, member: discord.Member):
-    user_id = member.id
+    warning_count = clear_warnings(interaction.guild.id, member.id)
     
-    if user_id not in user_warnings or not user_warnings[user_id]:
+    if not warning_count:
         await interaction.response.send_message(f"❌ {member.mention} has no warnings.", ephemeral=True)
         return
     
-    warning_count = len(user_warnings[user_id])
-    user_warnings[user_id] = []
-    
     embed = discord.Embed(
         title="✅ Warnings Cleared",
         description=f"Cleared {warning_count} warning(s) for {member.mention}.",
@@ -1171,20 +2999,25 @@ async def clearwarnings(interaction: discord.Interaction, member: discord.Member
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="checkwarnings", description="Check warnings for a user")
-async def checkwarnings(interaction: discord.Interaction, member: discord.Member):
-    user_id = member.id
+@app_commands.describe(member="The member to check", page="Page of warnings to show")
+async def checkwarnings(interaction: discord.Interaction, member: discord.Member, page: int = 1):
+    warnings = get_warnings(interaction.guild.id, member.id)
     
-    if user_id not in user_warnings or not user_warnings[user_id]:
+    if not warnings:
         await interaction.response.send_message(f"✅ {member.mention} has no warnings.", ephemeral=True)
         return
     
+    pages = (len(warnings) + WARNINGS_PAGE_SIZE - 1) // WARNINGS_PAGE_SIZE
+    page = max(1, min(page, pages))
+    start = (page - 1) * WARNINGS_PAGE_SIZE
+    
     embed = discord.Embed(
         title=f"⚠️ Warnings for {member.display_name}",
-        description=f"Total warnings: {len(user_warnings[user_id])}",
+        description=f"Total warnings: {len(warnings)}",
         color=discord.Color.orange()
     )
     
-    for i, warning in enumerate(user_warnings[user_id][:10], 1):
+    for i, warning in enumerate(warnings[start:start + WARNINGS_PAGE_SIZE], start + 1):
         timestamp = warning.get('timestamp', 'Unknown')
         moderator = warning.get('moderator', 'Unknown')
         reason = warning.get('reason', 'No reason')
@@ -1195,8 +3028,42 @@ async def checkwarnings(interaction: discord.Interaction, member: discord.Member
             inline=False
         )
     
-    if len(user_warnings[user_id]) > 10:
-        embed.set_footer(text=f"Showing 10 of {len(user_warnings[user_id])} warnings")
+    if pages > 1:
+        embed.set_footer(text=f"Page {page}/{pages} • Use the page option to see more")
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="prompthistory", description="Show a user's recent AI prompts (Admin only)")
+@app_commands.checks.has_permissions(moderate_members=True)
+async def prompthistory(interaction: discord.Interaction, member: discord.Member):
+    user_index = prompt_messages_by_user.get(member.id, {})
+    guild_channel_ids = {channel.id for channel in interaction.guild.channels}
+    recent = [
+        (message_id, channel_id)
+        for message_id, channel_id in reversed(user_index.items())
+        if channel_id in guild_channel_ids
+    ][:10]
+    
+    if not recent:
+        await interaction.response.send_message(f"✅ {member.mention} has no recorded AI prompts.", ephemeral=True)
+        return
+    
+    embed = discord.Embed(
+        title=f"🤖 AI Prompts by {member.display_name}",
+        color=discord.Color.blue()
+    )
+    
+    for message_id, channel_id in recent:
+        entry = prompt_messages[channel_id][message_id]
+        prompt_text = entry.get('prompt', '')
+        if len(prompt_text) > 200:
+            prompt_text = prompt_text[:197] + "..."
+        created_at = discord.utils.snowflake_time(message_id)
+        embed.add_field(
+            name=f"/{entry.get('type', 'unknown')} • {discord.utils.format_dt(created_at, 'R')}",
+            value=f"<#{channel_id}>\n{prompt_text}",
+            inline=False
+        )
     
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
@@ -1225,7 +3092,7 @@ async def prompt(interaction: discord.Interaction, prompt: str, max_tokens: int
 async def setverifyrole(interaction: discord.Interaction, role: discord.Role):
     guild_id = interaction.guild.id
     verify_roles[guild_id] = role.id
-    save_data()
+    save_data('verify_roles', key=guild_id)
     
     embed = discord.Embed(
         title="✅ Verification Role Set",
@@ -1267,8 +3134,8 @@ async def verify(interaction: discord.Interaction):
 @app_commands.checks.has_permissions(administrator=True)
 async def dm(interaction: discord.Interaction, member: discord.Member, message: str):
     guild_id = interaction.guild.id
-    config = get_server_config(guild_id)
-    if not config['features'].get('dm'):
+    config = get_guild_config(guild_id)
+    if not config.dm:
         await interaction.response.send_message("❌ This feature is currently disabled.", ephemeral=True)
         return
     
@@ -1286,53 +3153,167 @@ async def dm(interaction: discord.Interaction, member: discord.Member, message:
     except Exception as e:
         await interaction.response.send_message(f"❌ Failed to send DM: {e}", ephemeral=True)
 
+def _broadcast_progress_embed(state: dict, limiter: AdaptiveLimiter = None) -> discord.Embed:
+    processed = state['sent'] + state['failed']
+    embed = discord.Embed(
+        title="📨 Sending DMs...",
+        description=f"**Sent:** {state['sent']}\n**Failed:** {state['failed']}\n**Remaining:** {max(state['total'] - processed, 0)}",
+        color=discord.Color.blue()
+    )
+    if limiter:
+        embed.set_footer(text=f"Concurrency: {limiter.limit} • Use /dmcancel to stop")
+    return embed
+
+async def run_broadcast(guild: discord.Guild, interaction: discord.Interaction = None):
+    state = active_broadcasts[guild.id]
+    embed = discord.Embed(
+        title=f"📢 Announcement from {guild.name}",
+        description=state['message'],
+        color=discord.Color.purple()
+    )
+    embed.set_footer(text=f"Sent by {state['author']}")
+    
+    done_ahead = set(state['done_ahead'])
+    members = sorted(
+        (m for m in guild.members if not m.bot and m.id > state['last_id'] and m.id not in done_ahead),
+        key=lambda m: m.id
+    )
+    state['total'] = state['sent'] + state['failed'] + len(members)
+    pending = deque(m.id for m in members)
+    limiter = AdaptiveLimiter(BROADCAST_INITIAL_CONCURRENCY, BROADCAST_MAX_CONCURRENCY, BROADCAST_SLOW_SECONDS)
+    remaining = iter(members)
+    
+    async def send_one(member: discord.Member):
+        try:
+            await limiter.run(lambda: member.send(embed=embed))
+            state['sent'] += 1
+        except discord.Forbidden:
+            state['failed'] += 1
+        except Exception as e:
+            print(f"Error sending DM to {member}: {e}")
+            state['failed'] += 1
+        
+        done_ahead.add(member.id)
+        while pending and pending[0] in done_ahead:
+            state['last_id'] = pending.popleft()
+            done_ahead.discard(state['last_id'])
+        state['done_ahead'] = list(done_ahead)
+        save_data('broadcasts', key=guild.id)
+    
+    async def worker():
+        for member in remaining:
+            await send_one(member)
+    
+    workers = [asyncio.create_task(worker()) for _ in range(BROADCAST_MAX_CONCURRENCY)]
+    report_progress = interaction is not None
+    started = time.monotonic()
+    
+    try:
+        while True:
+            _, running = await asyncio.wait(workers, timeout=BROADCAST_PROGRESS_INTERVAL)
+            if not running:
+                break
+            if report_progress and time.monotonic() - started < BROADCAST_PROGRESS_TOKEN_TTL:
+                try:
+                    await interaction.edit_original_response(embed=_broadcast_progress_embed(state, limiter))
+                except Exception:
+                    report_progress = False
+            else:
+                print(f"Broadcast in {guild.name}: {state['sent']} sent, {state['failed']} failed of {state['total']}")
+    finally:
+        for task in workers:
+            task.cancel()
+    
+    active_broadcasts.pop(guild.id, None)
+    active_dm_tasks.pop(guild.id, None)
+    save_data('broadcasts', key=guild.id)
+    
+    result_embed = discord.Embed(
+        title="✅ DM Broadcast Complete",
+        description=f"**Sent:** {state['sent']}\n**Failed:** {state['failed']}",
+        color=discord.Color.green()
+    )
+    print(f"Broadcast in {guild.name} complete: {state['sent']} sent, {state['failed']} failed")
+    if report_progress and time.monotonic() - started < BROADCAST_PROGRESS_TOKEN_TTL:
+        try:
+            await interaction.edit_original_response(embed=result_embed)
+        except Exception as e:
+            print(f"Error updating broadcast status: {e}")
+
+def _broadcast_done(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        print(f"DM broadcast failed: {task.exception()}")
+
+def start_broadcast(guild: discord.Guild, interaction: discord.Interaction = None):
+    task = asyncio.create_task(run_broadcast(guild, interaction))
+    task.add_done_callback(_broadcast_done)
+    active_dm_tasks[guild.id] = task
+
+def resume_broadcasts():
+    for guild_id in list(active_broadcasts):
+        if guild_id in active_dm_tasks:
+            continue
+        guild = bot.get_guild(guild_id)
+        if guild:
+            print(f"Resuming DM broadcast in {guild.name}")
+            start_broadcast(guild)
+
 @bot.tree.command(name="dmeveryone", description="Send a DM to all server members (Admin only)")
 @app_commands.checks.has_permissions(administrator=True)
 async def dmeveryone(interaction: discord.Interaction, message: str):
-    await interaction.response.defer(ephemeral=True)
-    
     guild = interaction.guild
-    members = [m for m in guild.members if not m.bot]
     
-    if not members:
-        await interaction.followup.send("❌ No members to send DMs to.", ephemeral=True)
+    if guild.id in active_broadcasts:
+        await interaction.response.send_message("❌ A DM broadcast is already running. Use /dmcancel to stop it.", ephemeral=True)
         return
     
-    embed = discord.Embed(
-        title=f"📢 Announcement from {guild.name}",
-        description=message,
-        color=discord.Color.purple()
-    )
-    embed.set_footer(text=f"Sent by {interaction.user.display_name}")
+    if not any(not m.bot for m in guild.members):
+        await interaction.response.send_message("❌ No members to send DMs to.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True)
     
-    success_count = 0
-    failed_count = 0
+    active_broadcasts[guild.id] = {
+        'message': message,
+        'author': interaction.user.display_name,
+        'last_id': 0,
+        'done_ahead': [],
+        'sent': 0,
+        'failed': 0,
+        'total': 0
+    }
+    save_data('broadcasts', key=guild.id)
     
     status_embed = discord.Embed(
         title="📨 Sending DMs...",
-        description=f"Sending to {len(members)} members...",
+        description="Starting broadcast...",
         color=discord.Color.blue()
     )
     await interaction.followup.send(embed=status_embed, ephemeral=True)
+    start_broadcast(guild, interaction)
+
+@bot.tree.command(name="dmcancel", description="Cancel the running DM broadcast (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def dmcancel(interaction: discord.Interaction):
+    guild_id = interaction.guild.id
+    state = active_broadcasts.pop(guild_id, None)
     
-    for member in members:
-        try:
-            await member.send(embed=embed)
-            success_count += 1
-        except discord.Forbidden:
-            failed_count += 1
-        except Exception as e:
-            print(f"Error sending DM to {member}: {e}")
-            failed_count += 1
-        finally:
-            await asyncio.sleep(0.5)
+    if state is None:
+        await interaction.response.send_message("❌ No DM broadcast is running.", ephemeral=True)
+        return
     
-    result_embed = discord.Embed(
-        title="✅ DM Broadcast Complete",
-        description=f"**Sent:** {success_count}\n**Failed:** {failed_count}",
-        color=discord.Color.green()
+    task = active_dm_tasks.pop(guild_id, None)
+    if task:
+        task.cancel()
+    save_data('broadcasts', key=guild_id)
+    
+    embed = discord.Embed(
+        title="🛑 DM Broadcast Cancelled",
+        description=f"**Sent:** {state['sent']}\n**Failed:** {state['failed']}",
+        color=discord.Color.orange()
     )
-    await interaction.edit_original_response(embed=result_embed)
+    embed.set_footer(text=f"Cancelled by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="ticketpanel", description="Create a ticket panel (Admin only)")
 @app_commands.checks.has_permissions(administrator=True)
@@ -1356,28 +3337,60 @@ async def ticketpanel(interaction: discord.Interaction):
 @bot.tree.command(name="closeticket", description="Close a ticket channel (Admin only)")
 @app_commands.checks.has_permissions(administrator=True)
 async def closeticket(interaction: discord.Interaction):
+    await close_ticket(interaction)
+
+@bot.tree.command(name="reassignticket", description="Reassign the current ticket to another staff member")
+@app_commands.describe(member="The staff member who should handle this ticket")
+async def reassignticket(interaction: discord.Interaction, member: discord.Member):
     channel = interaction.channel
     guild_id = interaction.guild.id
     
-    if guild_id in active_tickets and channel.id in active_tickets[guild_id]:
-        embed = discord.Embed(
-            title="🔒 Closing Ticket",
-            description="This ticket will be deleted in 5 seconds...",
-            color=discord.Color.red()
-        )
-        embed.set_footer(text=f"Closed by {interaction.user.display_name}")
-        
-        await interaction.response.send_message(embed=embed)
-        
-        active_tickets[guild_id].remove(channel.id)
-        if channel.id in ticket_claims:
-            del ticket_claims[channel.id]
-        save_data()
-        
-        await asyncio.sleep(5)
-        await channel.delete(reason=f"Ticket closed by {interaction.user.display_name}")
-    else:
+    if not can_manage_tickets(interaction.user, guild_id):
+        await interaction.response.send_message("❌ You don't have permission to reassign tickets.", ephemeral=True)
+        return
+    
+    if channel.id not in active_tickets.get(guild_id, []):
         await interaction.response.send_message("❌ This is not an active ticket channel.", ephemeral=True)
+        return
+    
+    if member.bot or not can_manage_tickets(member, guild_id):
+        await interaction.response.send_message(f"❌ {member.mention} cannot manage tickets.", ephemeral=True)
+        return
+    
+    if ticket_claims.get(channel.id) == member.id:
+        await interaction.response.send_message(f"❌ This ticket is already assigned to {member.mention}.", ephemeral=True)
+        return
+    
+    ticket_claims[channel.id] = member.id
+    save_data('tickets', key=guild_id)
+    
+    embed = discord.Embed(
+        title="🔁 Ticket Reassigned",
+        description=f"{member.mention} is now handling this ticket.",
+        color=discord.Color.blue()
+    )
+    embed.set_footer(text=f"Reassigned by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed)
+    await update_ticket_status(channel)
+
+@bot.tree.command(name="settranscriptchannel", description="Set the channel that receives ticket transcripts (Admin only)")
+@app_commands.describe(channel="The log channel for transcripts (leave empty to stop posting them)")
+@app_commands.checks.has_permissions(administrator=True)
+async def settranscriptchannel(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    update_guild_config(interaction.guild.id, transcript_channel_id=channel.id if channel else None)
+    
+    if channel:
+        description = f"Closed ticket transcripts will be posted in {channel.mention}."
+    else:
+        description = "Closed ticket transcripts will only be kept in the local archive."
+    
+    embed = discord.Embed(
+        title="📜 Transcript Channel Updated",
+        description=description,
+        color=discord.Color.blue()
+    )
+    embed.set_footer(text=f"Changed by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="addsupportrole", description="Add a role that can manage tickets (Admin only)")
 @app_commands.checks.has_permissions(administrator=True)
@@ -1392,7 +3405,8 @@ async def addsupportrole(interaction: discord.Interaction, role: discord.Role):
         return
     
     support_roles[guild_id].append(role.id)
-    save_data()
+    ticket_overwrite_templates.pop(guild_id, None)
+    save_data('support_roles', key=guild_id)
     
     embed = discord.Embed(
         title="✅ Support Role Added",
@@ -1411,7 +3425,8 @@ async def removesupportrole(interaction: discord.Interaction, role: discord.Role
         return
     
     support_roles[guild_id].remove(role.id)
-    save_data()
+    ticket_overwrite_templates.pop(guild_id, None)
+    save_data('support_roles', key=guild_id)
     
     embed = discord.Embed(
         title="✅ Support Role Removed",
@@ -1448,6 +3463,239 @@ async def listsupportroles(interaction: discord.Interaction):
     
     await interaction.response.send_message(embed=embed)
 
+@bot.tree.command(name="filteradd", description="Add a word or phrase to this server's chat filter (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def filteradd(interaction: discord.Interaction, term: str):
+    config = get_guild_config(interaction.guild.id)
+    term = canonical_term(term)
+    
+    if not term or len(term) > MAX_FILTER_TERM_LENGTH:
+        await interaction.response.send_message(f"❌ Terms must contain letters or numbers and be at most {MAX_FILTER_TERM_LENGTH} characters.", ephemeral=True)
+        return
+    
+    custom = list(config.filter_words)
+    excluded = list(config.filter_excluded)
+    
+    if term in excluded:
+        excluded.remove(term)
+    elif term in custom or any(canonical_term(word) == term for word in BAD_WORDS):
+        await interaction.response.send_message(f"❌ ||{term}|| is already filtered.", ephemeral=True)
+        return
+    elif len(custom) >= MAX_FILTER_TERMS:
+        await interaction.response.send_message(f"❌ This server already has the maximum of {MAX_FILTER_TERMS} custom terms.", ephemeral=True)
+        return
+    else:
+        custom.append(term)
+    
+    update_guild_config(interaction.guild.id, filter_words=custom, filter_excluded=excluded)
+    
+    embed = discord.Embed(
+        title="✅ Filter Term Added",
+        description=f"||{term}|| will now be filtered in this server.",
+        color=discord.Color.green()
+    )
+    embed.set_footer(text=f"Changed by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="filterremove", description="Remove a word or phrase from this server's chat filter (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def filterremove(interaction: discord.Interaction, term: str):
+    config = get_guild_config(interaction.guild.id)
+    term = canonical_term(term)
+    
+    custom = list(config.filter_words)
+    excluded = list(config.filter_excluded)
+    
+    if term in custom:
+        custom.remove(term)
+    elif term not in excluded and any(canonical_term(word) == term for word in BAD_WORDS):
+        excluded.append(term)
+    else:
+        await interaction.response.send_message(f"❌ ||{term}|| is not filtered in this server.", ephemeral=True)
+        return
+    
+    update_guild_config(interaction.guild.id, filter_words=custom, filter_excluded=excluded)
+    
+    embed = discord.Embed(
+        title="✅ Filter Term Removed",
+        description=f"||{term}|| will no longer be filtered in this server.",
+        color=discord.Color.orange()
+    )
+    embed.set_footer(text=f"Changed by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="filterlist", description="List this server's chat filter changes (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def filterlist(interaction: discord.Interaction):
+    config = get_guild_config(interaction.guild.id)
+    custom = config.filter_words
+    excluded = config.filter_excluded
+    
+    embed = discord.Embed(
+        title="🧹 Chat Filter",
+        description=f"The built-in list has {len(BAD_WORDS)} terms. Changes for this server:",
+        color=discord.Color.blue()
+    )
+    embed.add_field(
+        name=f"Added ({len(custom)})",
+        value=", ".join(f"||{term}||" for term in custom)[:1024] if custom else "None",
+        inline=False
+    )
+    embed.add_field(
+        name=f"Removed ({len(excluded)})",
+        value=", ".join(f"||{term}||" for term in excluded)[:1024] if excluded else "None",
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="escalationadd", description="Add a step to this server's warning escalation ladder (Admin only)")
+@app_commands.describe(
+    warnings="Number of warnings that triggers this step",
+    action="What happens when a member reaches that many warnings",
+    minutes="Timeout length in minutes (timeout only)"
+)
+@app_commands.choices(action=[
+    app_commands.Choice(name="Timeout", value="timeout"),
+    app_commands.Choice(name="Kick", value="kick"),
+    app_commands.Choice(name="Ban", value="ban"),
+])
+@app_commands.checks.has_permissions(administrator=True)
+async def escalationadd(interaction: discord.Interaction, warnings: int, action: str, minutes: int = 60):
+    if warnings < 1 or warnings > 100:
+        await interaction.response.send_message("❌ Warning count must be between 1 and 100.", ephemeral=True)
+        return
+    
+    if action == "timeout" and (minutes < 1 or minutes > MAX_TIMEOUT_MINUTES):
+        await interaction.response.send_message(f"❌ Timeout must be between 1 and {MAX_TIMEOUT_MINUTES} minutes (28 days).", ephemeral=True)
+        return
+    
+    guild_id = interaction.guild.id
+    ladder = {str(threshold): dict(step) for threshold, step in get_guild_config(guild_id).escalation.items()}
+    
+    if str(warnings) not in ladder and len(ladder) >= MAX_ESCALATION_STEPS:
+        await interaction.response.send_message(f"❌ This server already has the maximum of {MAX_ESCALATION_STEPS} escalation steps.", ephemeral=True)
+        return
+    
+    step = {'action': action}
+    if action == "timeout":
+        step['minutes'] = minutes
+    ladder[str(warnings)] = step
+    update_guild_config(guild_id, escalation=ladder)
+    
+    embed = discord.Embed(
+        title="✅ Escalation Step Set",
+        description=f"Members reaching **{warnings}** warnings will receive: **{describe_escalation(step)}**.",
+        color=discord.Color.green()
+    )
+    embed.set_footer(text=f"Changed by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="escalationremove", description="Remove a step from this server's warning escalation ladder (Admin only)")
+@app_commands.describe(warnings="Warning count of the step to remove")
+@app_commands.checks.has_permissions(administrator=True)
+async def escalationremove(interaction: discord.Interaction, warnings: int):
+    guild_id = interaction.guild.id
+    ladder = {str(threshold): dict(step) for threshold, step in get_guild_config(guild_id).escalation.items()}
+    
+    if str(warnings) not in ladder:
+        await interaction.response.send_message(f"❌ There is no escalation step at {warnings} warnings.", ephemeral=True)
+        return
+    
+    del ladder[str(warnings)]
+    update_guild_config(guild_id, escalation=ladder or None)
+    
+    embed = discord.Embed(
+        title="✅ Escalation Step Removed",
+        description=f"Reaching **{warnings}** warnings no longer triggers an automatic action.",
+        color=discord.Color.orange()
+    )
+    embed.set_footer(text=f"Changed by {interaction.user.display_name}")
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="escalationlist", description="Show this server's warning escalation ladder (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def escalationlist(interaction: discord.Interaction):
+    ladder = get_guild_config(interaction.guild.id).escalation
+    
+    embed = discord.Embed(
+        title="📈 Warning Escalation",
+        description="\n".join(
+            f"**{threshold}** warnings → {describe_escalation(ladder[threshold])}"
+            for threshold in sorted(ladder)
+        ) if ladder else "No escalation steps configured. Use `/escalationadd` to create one.",
+        color=discord.Color.blue()
+    )
+    embed.set_footer(text="Warnings from /warn and auto-moderation both count")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="stats", description="Show bot runtime statistics (Admin only)")
+@app_commands.checks.has_permissions(administrator=True)
+async def stats(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="📊 Bot Statistics",
+        color=discord.Color.blue()
+    )
+    
+    lookups = ai_cache.hits + ai_cache.misses
+    hit_rate = (ai_cache.hits / lookups * 100) if lookups else 0.0
+    embed.add_field(
+        name="🧠 AI Response Cache",
+        value=(
+            f"**Entries:** {len(ai_cache.entries)}/{ai_cache.max_size}\n"
+            f"**Hits:** {ai_cache.hits}\n"
+            f"**Misses:** {ai_cache.misses}\n"
+            f"**Hit Rate:** {hit_rate:.1f}%"
+        ),
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🛡️ Spam Tracker",
+        value=(
+            f"**Tracked:** {len(spam_tracker.entries)}/{spam_tracker.max_entries}\n"
+            f"**Memory:** ~{spam_tracker.memory_bytes() / 1024:.1f} KiB\n"
+            f"**Evicted:** {spam_tracker.evicted}\n"
+            f"**Raids Detected:** {raid_detector.raids_detected}"
+        ),
+        inline=False
+    )
+    
+    embed.add_field(
+        name="🧹 Moderation Queue",
+        value=(
+            f"**Messages Deleted:** {moderation_queue.messages_deleted} ({moderation_queue.bulk_calls} bulk calls)\n"
+            f"**Summaries Posted:** {moderation_queue.notices_posted}\n"
+            f"**Actions Run:** {moderation_queue.actions_run}"
+        ),
+        inline=False
+    )
+    
+    next_expiry = min((expires_at for mutes in timed_mutes.values() for expires_at in mutes.values()), default=None)
+    embed.add_field(
+        name="🔇 Timed Mutes",
+        value=(
+            f"**Pending:** {mute_scheduler.pending()}\n"
+            f"**Expired:** {mute_scheduler.expired}\n"
+            f"**Next Expiry:** {f'<t:{int(next_expiry)}:R>' if next_expiry else 'None'}"
+        ),
+        inline=False
+    )
+    
+    for limiter in ai_limiters.values():
+        average_wait = limiter.total_wait / limiter.served if limiter.served else 0.0
+        embed.add_field(
+            name=f"🚦 {limiter.name} Queue",
+            value=(
+                f"**In Flight:** {limiter.in_flight}/{limiter.max_in_flight}\n"
+                f"**Queued:** {limiter.queued} (peak {limiter.max_queue_depth})\n"
+                f"**Served:** {limiter.served}\n"
+                f"**Wait:** avg {average_wait:.2f}s • max {limiter.max_wait:.2f}s"
+            ),
+            inline=True
+        )
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.tree.command(name="sync", description="Sync slash commands to this server (Admin only)")
 @app_commands.checks.has_permissions(administrator=True)
 async def sync(interaction: discord.Interaction):
@@ -0,0 +1,87 @@
+import re
+import unicodedata
+
+BAD_WORDS = [
+    "fuck", "fucking", "fucked", "fucker", "fck", "f*ck",
+    "shit", "shitty", "shitting", "bullshit", "horseshit",
+    "bitch", "bitching", "bastard", "asshole",
+    "ass","dick", "cock", "penis", "pussy",
+    "vagina", "cunt", "whore", "slut", "hoe", "prostitute",
+    "nigger", "nigga", "negro", "n*gger", "n*gga",
+    "fag", "faggot", "f*ggot", "dyke", "retard", "retarded",
+    "terrorist", "rape", "raping", "rapist",
+    "kill yourself", "kys", "suicide", "cancer", "aids",
+    "holocaust", "dork", "nazi", "hitler", "slave", "slavery"
+]
+
+LEETSPEAK = {
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't',
+    '@': 'a', '$': 's'
+}
+
+CONFUSABLES = {
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o',
+    'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x', 'і': 'i', 'ј': 'j', 'ѕ': 's',
+    'ԁ': 'd', 'һ': 'h', 'ӏ': 'l', 'ɡ': 'g', 'ı': 'i',
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+    'τ': 't', 'υ': 'u', 'χ': 'x'
+}
+
+WORD_PREFIXES = ('', 'mother', 'dumb', 'jack', 'dip')
+WORD_SUFFIXES = ('', 's', 'es', 'er', 'ers', 'ing', 'in', 'ed', 'head', 'heads', 'face')
+ALLOWED_FORMS = frozenset({'cocked', 'cocking', 'cocker', 'cockers', 'hoed', 'hoeing', 'hoer', 'fagin', 'dicker', 'dickers', 'slaver', 'slavers', 'asser', 'assin'})
+
+NORMALIZE_TABLE = str.maketrans({
+    **{ch: sub for ch, sub in LEETSPEAK.items() if not ch.isdigit()},
+    **CONFUSABLES
+})
+DIGIT_TABLE = str.maketrans({ch: sub for ch, sub in LEETSPEAK.items() if ch.isdigit()})
+WORD_PATTERN = re.compile(r"\w(?:[\w*]*\w)?")
+DIGIT_PATTERN = re.compile(r"\d")
+LETTER_TOKEN_PATTERN = re.compile(r"[\w*]*[^\W\d_][\w*]*")
+
+def _substitute_digits(match: re.Match) -> str:
+    return match.group(0).translate(DIGIT_TABLE)
+
+def normalize(text: str) -> str:
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold().translate(NORMALIZE_TABLE)
+    if DIGIT_PATTERN.search(text):
+        text = LETTER_TOKEN_PATTERN.sub(_substitute_digits, text)
+    return text
+
+def canonical_term(term: str) -> str:
+    return " ".join(WORD_PATTERN.findall(normalize(term)))
+
+class ProfanityMatcher:
+    __slots__ = ('words', 'phrases')
+
+    def __init__(self, terms):
+        words = set()
+        phrases = {}
+        for term in terms:
+            tokens = tuple(WORD_PATTERN.findall(normalize(term)))
+            if len(tokens) == 1:
+                words.update(prefix + tokens[0] + suffix for prefix in WORD_PREFIXES for suffix in WORD_SUFFIXES)
+            elif tokens:
+                phrases.setdefault(tokens[0], []).append(tokens[1:])
+        self.words = frozenset(words - ALLOWED_FORMS)
+        self.phrases = phrases
+
+    def search(self, text: str):
+        tokens = WORD_PATTERN.findall(normalize(text))
+
+        if not self.words.isdisjoint(tokens):
+            for token in tokens:
+                if token in self.words:
+                    return token
+
+        if self.phrases and not self.phrases.keys().isdisjoint(tokens):
+            for i, token in enumerate(tokens):
+                for rest in self.phrases.get(token, ()):
+                    if tuple(tokens[i + 1:i + 1 + len(rest)]) == rest:
+                        return " ".join((token,) + rest)
+
+        return None